@@ -0,0 +1,113 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from mock_dynatrace import MockDynatraceState, start_mock_server
+from run_benchmarks import APP_PATH, mock_request
+
+# Cold start benchmark: how long a fresh evaluator process takes before it does useful work
+#   interpreter   = python -c pass, for reference
+#   import        = python -c "import dynatrace_endpoint_evaluator"
+#   first request = process start until the first Dynatrace API request reaches the local mock
+#   run           = a whole run for one URL whose monitor already exists
+# Each is the median of --runs fresh processes
+#
+# Fails (exit 1) if the first request takes longer than the budget, or if importing the package
+# loads a module that should only be imported when it is needed, so it can gate a release
+#
+# Usage:
+#   python benchmarks/cold_start.py
+#   python benchmarks/cold_start.py --runs 10 --budget-seconds 0.5 --json cold_start.json
+
+REPOSITORY_PATH = os.path.dirname(APP_PATH)
+DEFAULT_RUNS = 5
+COLD_START_BUDGET_SECONDS = 0.5
+# None of these may be imported by "import dynatrace_endpoint_evaluator"
+LAZY_MODULES = ["numpy", "requests", "asyncio", "http.server", "cProfile", "pstats", "xml.etree.ElementTree", "sqlite3", "doctest"]
+
+COLD_START_CONFIG = {
+    "defaultRootUrl": "https://cold-start.example.com",
+    "defaultLocations": ["GEOLOCATION-0000000000000001"],
+    "resultPollIntervalSeconds": 0.1
+}
+
+def run_seconds(arguments, directory, environment):
+    start_time = time.perf_counter()
+    subprocess.run(arguments, cwd=directory, env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start_time
+
+# Returns (seconds until the mock saw the first request, seconds for the whole run)
+def run_app(directory, environment, mock_url, state):
+    mock_request(mock_url, "/_mock/reset")
+    started_at = time.time()
+    run_wall_seconds = run_seconds([sys.executable, APP_PATH], directory, environment)
+    if state.first_request_at is None:
+        raise RuntimeError("The evaluator never called the mock Dynatrace API")
+    return state.first_request_at - started_at, run_wall_seconds
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the cold start of the evaluator")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Fresh processes per measurement")
+    parser.add_argument("--budget-seconds", type=float, default=COLD_START_BUDGET_SECONDS, help="Maximum median time to the first Dynatrace request")
+    parser.add_argument("--json", help="Also write the results to this file")
+    arguments = parser.parse_args()
+
+    environment = dict(os.environ, PYTHONPATH=REPOSITORY_PATH)
+    lazy_modules_check = f"import sys, json; import dynatrace_endpoint_evaluator; print(json.dumps([name for name in {LAZY_MODULES!r} if name in sys.modules]))"
+    eagerly_imported = json.loads(subprocess.run([sys.executable, "-c", lazy_modules_check], env=environment, capture_output=True, text=True, check=True).stdout)
+
+    state = MockDynatraceState(execution_seconds=0)
+    server = start_mock_server(state)
+    mock_url = f"http://127.0.0.1:{server.server_address[1]}"
+    app_environment = dict(environment, dt_environment_url=mock_url, dt_api_token="benchmark")
+
+    measurements = { "interpreter": [], "import": [], "firstRequest": [], "run": [] }
+    with tempfile.TemporaryDirectory() as directory:
+        dynatrace_directory = os.path.join(directory, ".dynatrace")
+        os.makedirs(dynatrace_directory)
+        with open(os.path.join(dynatrace_directory, "config.json"), "w") as config_file:
+            json.dump(COLD_START_CONFIG, config_file)
+        with open(os.path.join(dynatrace_directory, "urls.txt"), "w") as urls_file:
+            urls_file.write("/\n")
+
+        # Not measured: creates the monitor and the caches, like any run after the first
+        run_app(directory, app_environment, mock_url, state)
+
+        for _ in range(arguments.runs):
+            measurements['interpreter'].append(run_seconds([sys.executable, "-c", "pass"], directory, environment))
+            measurements['import'].append(run_seconds([sys.executable, "-c", "import dynatrace_endpoint_evaluator"], directory, environment))
+            first_request_seconds, run_wall_seconds = run_app(directory, app_environment, mock_url, state)
+            measurements['firstRequest'].append(first_request_seconds)
+            measurements['run'].append(run_wall_seconds)
+
+    server.shutdown()
+    server.server_close()
+
+    results = { name: round(statistics.median(values), 3) for name, values in measurements.items() }
+    results['budgetSeconds'] = arguments.budget_seconds
+    results['eagerlyImported'] = eagerly_imported
+
+    print(f"{'Interpreter (s)':>16} {'Import (s)':>11} {'First request (s)':>18} {'Run (s)':>8} {'Budget (s)':>11}")
+    print(f"{results['interpreter']:>16} {results['import']:>11} {results['firstRequest']:>18} {results['run']:>8} {results['budgetSeconds']:>11}")
+
+    if arguments.json:
+        with open(arguments.json, "w") as json_file:
+            json.dump(results, json_file, indent=2)
+
+    failed = False
+    if len(eagerly_imported) > 0:
+        print(f"Importing the package loaded {', '.join(eagerly_imported)}. These should only be imported when they are used.")
+        failed = True
+    if results['firstRequest'] > arguments.budget_seconds:
+        print(f"The first Dynatrace request took {results['firstRequest']}s. The budget is {arguments.budget_seconds}s.")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
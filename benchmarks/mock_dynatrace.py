@@ -0,0 +1,363 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+# Local stand-in for the parts of the Dynatrace API used by the evaluator
+# Everything is held in memory and lost when the server stops
+#
+# Run on its own:
+#   python benchmarks/mock_dynatrace.py --port 8080 --sync-delay-seconds 5
+# then point the evaluator (python app.py) at it with dt_environment_url=http://127.0.0.1:8080 (any dt_api_token works)
+
+SYNCHRONIZING_CAUSE = "Monitor's configuration is being synchronized. Please try in a moment."
+
+class MockDynatraceState:
+    def __init__(self, latency_seconds=0, sync_delay_seconds=0, execution_seconds=1, rate_limit_probability=0, failure_probability=0):
+        # Added to every API response
+        self.latency_seconds = latency_seconds
+        # Time after creation during which a monitor cannot be triggered
+        self.sync_delay_seconds = sync_delay_seconds
+        # Time an execution takes before its fullReport reaches DATA_RETRIEVED
+        self.execution_seconds = execution_seconds
+        # Chance of any API request being answered with 429 (with Retry-After) or 500
+        self.rate_limit_probability = rate_limit_probability
+        self.failure_probability = failure_probability
+
+        self.lock = threading.Lock()
+        self.monitors = {}
+        self.batches = {}
+        self.executions = {}
+        self.request_counts = {}
+        # When the first request since the last reset arrived (time.time()). Used to measure cold starts
+        self.first_request_at = None
+        self.next_id = 1
+
+    def reset_stats(self):
+        with self.lock:
+            self.request_counts = {}
+            self.first_request_at = None
+
+    def stats(self):
+        with self.lock:
+            return {
+                "requestCount": sum(self.request_counts.values()),
+                "requestCounts": dict(self.request_counts),
+                "monitorCount": len(self.monitors),
+                "executionCount": len(self.executions),
+                "firstRequestAt": self.first_request_at
+            }
+
+    def count_request(self, route):
+        with self.lock:
+            if self.first_request_at is None:
+                self.first_request_at = time.time()
+            self.request_counts[route] = self.request_counts.get(route, 0) + 1
+
+    def new_id(self):
+        with self.lock:
+            self.next_id += 1
+            return self.next_id
+
+# Scores are derived from the URL so the same URL always gets the same result
+# URLs containing "missing" return 404, "slow" have a poor TTFB and "expiring" have a certificate expiring in 10 days
+def build_execution_steps(url, started_at):
+    url_hash = zlib.crc32(url.encode("utf-8"))
+    time_to_first_byte = 2500 if "slow" in url else 100 + url_hash % 700
+    certificate_days_remaining = 10 if "expiring" in url else 200
+    return [{
+        "requestName": url,
+        "responseStatusCode": 404 if "missing" in url else 200,
+        "totalTime": time_to_first_byte + 50,
+        "hostNameResolutionTime": 5 + url_hash % 20,
+        "tcpConnectTime": 10 + url_hash % 30,
+        "tlsHandshakeTime": 0 if url.startswith("http://") else 20 + url_hash % 40,
+        "timeToFirstByte": time_to_first_byte,
+        "peerCertificateDetails": "" if url.startswith("http://") else "CN=mock",
+        "peerCertificateExpiryDate": int((started_at + certificate_days_remaining * 86400) * 1000)
+    }]
+
+def build_full_report(state, execution_id):
+    execution = state.executions[execution_id]
+    is_done = time.time() - execution['triggeredAt'] >= execution['duration']
+    return {
+        "monitorId": execution['monitorId'],
+        "executionId": execution_id,
+        "locationId": execution['locationId'],
+        "executionStage": "DATA_RETRIEVED" if is_done else "TRIGGERED",
+        "simpleResults": {
+            "startTimestamp": int(execution['triggeredAt'] * 1000),
+            "status": "SUCCESS"
+        },
+        "fullResults": {
+            "status": "SUCCESS",
+            "startTimestamp": int(execution['triggeredAt'] * 1000),
+            "executionSteps": build_execution_steps(execution['url'], execution['triggeredAt']) if is_done else []
+        }
+    }
+
+def make_handler(state):
+    class MockDynatraceHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, status_code, body, headers=None):
+            encoded_body = json.dumps(body).encode("utf-8")
+            self.send_response(status_code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(encoded_body)))
+            for header_name, header_value in (headers or {}).items():
+                self.send_header(header_name, header_value)
+            self.end_headers()
+            self.wfile.write(encoded_body)
+
+        def send_empty(self, status_code):
+            self.send_response(status_code)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def read_body(self):
+            content_length = int(self.headers.get("Content-Length") or 0)
+            raw_body = self.rfile.read(content_length)
+            if raw_body == b"":
+                return None
+            if "json" in (self.headers.get("Content-Type") or ""):
+                return json.loads(raw_body)
+            return raw_body.decode("utf-8")
+
+        def do_GET(self):
+            self.route("GET")
+
+        def do_POST(self):
+            self.route("POST")
+
+        def do_PUT(self):
+            self.route("PUT")
+
+        def do_DELETE(self):
+            self.route("DELETE")
+
+        def route(self, method):
+            split_path = urlsplit(self.path)
+            query = { key: values[0] for key, values in parse_qs(split_path.query).items() }
+            path = split_path.path
+            body = self.read_body()
+
+            # Control endpoints are not part of the Dynatrace API
+            if path == "/_mock/stats":
+                return self.send_json(200, state.stats())
+            if path == "/_mock/reset":
+                state.reset_stats()
+                return self.send_json(200, {})
+
+            for route_method, route_pattern, route_handler in ROUTES:
+                match = re.fullmatch(route_pattern, path)
+                if route_method == method and match is not None:
+                    state.count_request(f"{method} {route_pattern}")
+                    if state.latency_seconds > 0:
+                        time.sleep(state.latency_seconds)
+                    if random.random() < state.rate_limit_probability:
+                        return self.send_json(429, { "error": { "code": 429, "message": "Too many requests" } }, { "Retry-After": "1" })
+                    if random.random() < state.failure_probability:
+                        return self.send_json(500, { "error": { "code": 500, "message": "Injected failure" } })
+                    return route_handler(self, query, body, *match.groups())
+
+            self.send_json(404, { "error": { "code": 404, "message": f"No mock for {method} {path}" } })
+
+        # GET /api/v2/entities
+        # nextPageKey encodes the offset and page size like the real API keeps the query in the key
+        def get_entities(self, query, body):
+            if "nextPageKey" in query:
+                offset, page_size = [int(part) for part in query['nextPageKey'].split(":")]
+            else:
+                offset, page_size = 0, int(query.get("pageSize", 50))
+
+            with state.lock:
+                monitors = sorted(state.monitors.values(), key=lambda monitor: monitor['entityId'])
+            page = monitors[offset:offset + page_size]
+
+            response_body = {
+                "totalCount": len(monitors),
+                "pageSize": page_size,
+                "entities": [{
+                    "entityId": monitor['entityId'],
+                    "type": "HTTP_CHECK",
+                    "displayName": monitor['name'],
+                    "tags": [{
+                        "context": tag.get("context", "CONTEXTLESS"),
+                        "key": tag['key'],
+                        "value": tag.get("value"),
+                        "stringRepresentation": tag['key'] if tag.get("value") is None else f"{tag['key']}:{tag['value']}"
+                    } for tag in monitor.get("tags", [])]
+                } for monitor in page]
+            }
+            if offset + page_size < len(monitors):
+                response_body['nextPageKey'] = f"{offset + page_size}:{page_size}"
+            self.send_json(200, response_body)
+
+        # POST /api/v1/synthetic/monitors
+        def create_monitor(self, query, body):
+            monitor_id = "HTTP_CHECK-%016X" % state.new_id()
+            with state.lock:
+                state.monitors[monitor_id] = dict(body, entityId=monitor_id, syncedAt=time.time() + state.sync_delay_seconds)
+            self.send_json(200, { "entityId": monitor_id, "name": body['name'] })
+
+        # PUT /api/v1/synthetic/monitors/{id}
+        def update_monitor(self, query, body, monitor_id):
+            with state.lock:
+                if monitor_id not in state.monitors:
+                    return self.send_json(404, { "error": { "code": 404, "message": "Monitor not found" } })
+                state.monitors[monitor_id] = dict(body, entityId=monitor_id, syncedAt=time.time() + state.sync_delay_seconds)
+            self.send_empty(204)
+
+        # DELETE /api/v1/synthetic/monitors/{id}
+        def delete_monitor(self, query, body, monitor_id):
+            with state.lock:
+                if state.monitors.pop(monitor_id, None) is None:
+                    return self.send_json(404, { "error": { "code": 404, "message": "Monitor not found" } })
+            self.send_empty(204)
+
+        # POST /api/v2/synthetic/executions/batch
+        def trigger_batch(self, query, body):
+            batch_id = str(state.new_id())
+            triggered = []
+            triggering_problems = []
+            now = time.time()
+
+            with state.lock:
+                for requested_monitor in body['monitors']:
+                    monitor_id = requested_monitor['monitorId']
+                    monitor = state.monitors.get(monitor_id)
+                    if monitor is None:
+                        triggering_problems.append({ "entityId": monitor_id, "cause": "Monitor not found", "details": "" })
+                        continue
+                    if now < monitor['syncedAt']:
+                        triggering_problems.append({ "entityId": monitor_id, "cause": SYNCHRONIZING_CAUSE, "details": "" })
+                        continue
+
+                    executions = []
+                    for location_id in monitor['locations']:
+                        state.next_id += 1
+                        execution_id = str(state.next_id)
+                        state.executions[execution_id] = {
+                            "monitorId": monitor_id,
+                            "locationId": location_id,
+                            "url": monitor['script']['requests'][0]['url'],
+                            "triggeredAt": now,
+                            "duration": state.execution_seconds * random.uniform(0.5, 1)
+                        }
+                        executions.append({ "executionId": execution_id, "locationId": location_id })
+                    triggered.append({ "monitorId": monitor_id, "executions": executions })
+
+                state.batches[batch_id] = {
+                    "triggered": triggered,
+                    "triggeringProblems": triggering_problems
+                }
+
+            self.send_json(200, {
+                "batchId": batch_id,
+                "triggeredCount": len(triggered),
+                "triggeringProblemsCount": len(triggering_problems),
+                "triggered": triggered,
+                "triggeringProblemsDetails": triggering_problems
+            })
+
+        # GET /api/v2/synthetic/executions/batch/{id}
+        def get_batch(self, query, body, batch_id):
+            batch = state.batches.get(batch_id)
+            if batch is None:
+                return self.send_json(404, { "error": { "code": 404, "message": "Batch not found" } })
+            now = time.time()
+            execution_ids = [execution['executionId'] for triggered in batch['triggered'] for execution in triggered['executions']]
+            is_running = any(now - state.executions[execution_id]['triggeredAt'] < state.executions[execution_id]['duration'] for execution_id in execution_ids)
+            self.send_json(200, {
+                "batchId": batch_id,
+                "batchStatus": "RUNNING" if is_running else "SUCCESS",
+                "triggeredCount": len(batch['triggered']),
+                "triggeringProblemsCount": len(batch['triggeringProblems']),
+                "triggeringProblems": batch['triggeringProblems']
+            })
+
+        # GET /api/v2/synthetic/executions/{id}/fullReport
+        def get_full_report(self, query, body, execution_id):
+            if execution_id not in state.executions:
+                return self.send_json(404, { "error": { "code": 404, "message": "Execution not found" } })
+            self.send_json(200, build_full_report(state, execution_id))
+
+        # GET /api/v2/synthetic/execution/{monitorId}/{SUCCESS|FAILED}/fullReport
+        # Every mock execution succeeds, so FAILED never has a result
+        def get_latest_execution(self, query, body, monitor_id, result_type):
+            now = time.time()
+            with state.lock:
+                finished_execution_ids = [
+                    execution_id for execution_id, execution in state.executions.items()
+                    if execution['monitorId'] == monitor_id
+                    and query.get("locationId", execution['locationId']) == execution['locationId']
+                    and now - execution['triggeredAt'] >= execution['duration']
+                ]
+            if result_type == "FAILED" or len(finished_execution_ids) == 0:
+                return self.send_json(404, { "error": { "code": 404, "message": "No execution found" } })
+            latest_execution_id = max(finished_execution_ids, key=lambda execution_id: state.executions[execution_id]['triggeredAt'])
+            self.send_json(200, build_full_report(state, latest_execution_id))
+
+        # POST /api/v2/metrics/ingest
+        # Lines are only counted, not validated
+        def ingest_metrics(self, query, body):
+            lines = [line for line in (body or "").splitlines() if line.strip() != ""]
+            self.send_json(202, { "linesOk": len(lines), "linesInvalid": 0, "error": None })
+
+    ROUTES = [
+        ("GET", r"/api/v2/entities", MockDynatraceHandler.get_entities),
+        ("POST", r"/api/v1/synthetic/monitors", MockDynatraceHandler.create_monitor),
+        ("PUT", r"/api/v1/synthetic/monitors/([^/]+)", MockDynatraceHandler.update_monitor),
+        ("DELETE", r"/api/v1/synthetic/monitors/([^/]+)", MockDynatraceHandler.delete_monitor),
+        ("POST", r"/api/v2/synthetic/executions/batch", MockDynatraceHandler.trigger_batch),
+        ("GET", r"/api/v2/synthetic/executions/batch/([^/]+)", MockDynatraceHandler.get_batch),
+        ("GET", r"/api/v2/synthetic/executions/([^/]+)/fullReport", MockDynatraceHandler.get_full_report),
+        ("GET", r"/api/v2/synthetic/execution/([^/]+)/(SUCCESS|FAILED)/fullReport", MockDynatraceHandler.get_latest_execution),
+        ("POST", r"/api/v2/metrics/ingest", MockDynatraceHandler.ingest_metrics)
+    ]
+
+    return MockDynatraceHandler
+
+# Start the mock on a background thread. Port 0 picks a free port
+# Returns the running server. Its URL is f"http://127.0.0.1:{server.server_address[1]}"
+def start_mock_server(state, port=0):
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    return server
+
+def add_state_arguments(parser):
+    parser.add_argument("--latency-ms", type=float, default=0, help="Latency added to every API response")
+    parser.add_argument("--sync-delay-seconds", type=float, default=0, help="How long a new monitor reports that it is being synchronized")
+    parser.add_argument("--execution-seconds", type=float, default=1, help="How long an execution takes to reach DATA_RETRIEVED")
+    parser.add_argument("--rate-limit-probability", type=float, default=0, help="Chance of a request being answered with 429")
+    parser.add_argument("--failure-probability", type=float, default=0, help="Chance of a request being answered with 500")
+
+def state_from_arguments(arguments):
+    return MockDynatraceState(
+        latency_seconds=arguments.latency_ms / 1000,
+        sync_delay_seconds=arguments.sync_delay_seconds,
+        execution_seconds=arguments.execution_seconds,
+        rate_limit_probability=arguments.rate_limit_probability,
+        failure_probability=arguments.failure_probability
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the Dynatrace API used by the evaluator")
+    parser.add_argument("--port", type=int, default=8080)
+    add_state_arguments(parser)
+    arguments = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", arguments.port), make_handler(state_from_arguments(arguments)))
+    print(f"Mock Dynatrace API listening on http://127.0.0.1:{arguments.port}")
+    server.serve_forever()
@@ -0,0 +1,110 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from mock_dynatrace import start_mock_server, add_state_arguments, state_from_arguments
+
+# End-to-end benchmark of app.py against the local mock Dynatrace API
+# For every endpoint count, app.py is run twice in a fresh .dynatrace folder:
+#   cold = no caches, every monitor has to be created
+#   warm = second run, monitors exist and caches are populated
+# and the wall-clock time, number of API requests and peak memory (RSS) of each run are reported
+#
+# Usage:
+#   python benchmarks/run_benchmarks.py
+#   python benchmarks/run_benchmarks.py --sizes 10,1000 --latency-ms 20 --json bench_results.json
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+DEFAULT_SIZES = "10,1000,50000"
+
+# Keeps app.py's own waits short so the benchmark measures the evaluator rather than sleeps
+BENCHMARK_CONFIG = {
+    "defaultRootUrl": "https://bench.example.com",
+    "defaultLocations": ["GEOLOCATION-0000000000000001"],
+    "monitorCreationConcurrency": 50,
+    "monitorCreationRatePerSecond": 100000,
+    "resultPollIntervalSeconds": 0.5
+}
+
+def mock_request(mock_url, path):
+    with urllib.request.urlopen(f"{mock_url}{path}") as response:
+        return json.load(response)
+
+def write_endpoints(directory, endpoint_count):
+    dynatrace_directory = os.path.join(directory, ".dynatrace")
+    os.makedirs(dynatrace_directory)
+    with open(os.path.join(dynatrace_directory, "config.json"), "w") as config_file:
+        json.dump(BENCHMARK_CONFIG, config_file)
+    with open(os.path.join(dynatrace_directory, "urls.txt"), "w") as urls_file:
+        for endpoint_number in range(endpoint_count):
+            urls_file.write(f"/page/{endpoint_number}\n")
+
+# Returns a dictionary of measurements for a single app.py run
+def run_app(directory, mock_url):
+    mock_request(mock_url, "/_mock/reset")
+    environment = dict(os.environ, dt_environment_url=mock_url, dt_api_token="benchmark")
+
+    start_time = time.perf_counter()
+    process = subprocess.Popen([sys.executable, APP_PATH], cwd=directory, env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    # wait4 returns the resource usage of this child only
+    _, exit_status, resource_usage = os.wait4(process.pid, 0)
+    wall_seconds = time.perf_counter() - start_time
+    stderr = process.stderr.read().decode("utf-8", errors="replace")
+    process.stderr.close()
+
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak_memory_mb = resource_usage.ru_maxrss / 1024
+    if sys.platform == "darwin":
+        peak_memory_mb = peak_memory_mb / 1024
+
+    return {
+        "exitCode": os.waitstatus_to_exitcode(exit_status) if hasattr(os, "waitstatus_to_exitcode") else exit_status >> 8,
+        "wallSeconds": round(wall_seconds, 2),
+        "requestCount": mock_request(mock_url, "/_mock/stats")['requestCount'],
+        "peakMemoryMb": round(peak_memory_mb, 1),
+        "stderr": stderr[-2000:]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark app.py against the local mock Dynatrace API")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma separated endpoint counts")
+    parser.add_argument("--json", help="Also write the results to this file")
+    add_state_arguments(parser)
+    arguments = parser.parse_args()
+
+    results = []
+    print(f"{'Endpoints':>10} {'Run':>5} {'Wall (s)':>10} {'Requests':>10} {'Peak RSS (MB)':>14} {'Exit':>5}")
+
+    for endpoint_count in [int(size) for size in arguments.sizes.split(",")]:
+        # A fresh tenant per size so cold runs really are cold
+        server = start_mock_server(state_from_arguments(arguments))
+        mock_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+        with tempfile.TemporaryDirectory() as directory:
+            write_endpoints(directory, endpoint_count)
+            for run_name in ["cold", "warm"]:
+                result = run_app(directory, mock_url)
+                print(f"{endpoint_count:>10} {run_name:>5} {result['wallSeconds']:>10} {result['requestCount']:>10} {result['peakMemoryMb']:>14} {result['exitCode']:>5}")
+                if result['exitCode'] != 0:
+                    print(result['stderr'])
+                result.pop("stderr")
+                results.append(dict(result, endpoints=endpoint_count, run=run_name))
+
+        server.shutdown()
+        server.server_close()
+
+    if arguments.json:
+        with open(arguments.json, "w") as json_file:
+            json.dump(results, json_file, indent=2)
+
+    # Fail if any run failed so the benchmark can gate a release
+    if any(result['exitCode'] != 0 for result in results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2 @@
+# Kept light: importing the package does not load numpy, requests or the config. main() does the work
+from dynatrace_endpoint_evaluator.evaluator import main
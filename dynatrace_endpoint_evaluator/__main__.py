@@ -0,0 +1,3 @@
+from dynatrace_endpoint_evaluator.evaluator import main
+
+main()
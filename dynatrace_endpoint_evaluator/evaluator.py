@@ -0,0 +1,2757 @@
+import json
+import os
+import time
+import atexit
+import contextlib
+import array
+import math
+import io
+import gzip
+import zlib
+import hashlib
+import urllib.parse
+import random
+import datetime
+import email.utils
+import threading
+import sys
+import uuid
+from xml.sax.saxutils import escape, quoteattr
+import fnmatch
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+
+WARNING_THRESHOLD = 80
+FAIL_THRESHOLD = 50
+
+# Remove 20 points if cert is expiring within 30 days
+CERT_DAYS_REMAINING_THRESHOLD = 30
+CERT_INVALIDATING_SOON_POINT_DEDUCTION = 20
+
+# Remove 100 points if response code > 400
+RESPONSE_CODE_THRESHOLD = 400
+RESPONSE_CODE_POINT_DEDUCTION = 100
+
+# Page is served over http not https
+INSECURE_POINT_DEDUCTION = 80
+
+# Remove 10 points if TTFB needs improvement
+# Remove 15 points if TTFB is poor
+TTFB_NEEDS_IMPROVEMENT_TIME_THRESHOLD = 800
+TTFB_POOR_TIME_THRESHOLD = 1800
+TTFB_NEEDS_IMPROVEMENT_POINT_DEDUCTION = 10
+TTFB_POOR_POINT_DEDUCTION = 15
+
+# Scoring rules used unless .dynatrace/config.json has scoringRules.rules
+# A rule deducts points from a step when `metric operator threshold` is true
+# Only the first matching rule of a group deducts points. This is how TTFB is either poor or needs improvement
+# and why a cert that is about to expire does not matter on a page that is already insecure
+#
+# ttfb (https://web.dev/ttfb/#what-is-a-good-ttfb-score)
+# 0 - 800ms = good (-0 points)
+# 801 - 1800 = needs improvement (-10 points)
+# >1801 = poor (-15 points)
+#
+# FCP (https://web.dev/fcp/#what-is-a-good-fcp-score)
+# 0 - 1800ms = good (-0 points)
+# 1801ms - 3000ms = needs improvement (-10 points)
+# > 3000ms = poor (-15 points)
+# TODO: FCP is not in the HTTP monitor results
+DEFAULT_SCORING_RULES = [
+    { "name": "insecure", "metric": "insecure", "operator": "==", "threshold": 1, "deduction": INSECURE_POINT_DEDUCTION, "group": "security", "reason": "page is insecure (served over http not https)" },
+    { "name": "certExpiring", "metric": "certDaysRemaining", "operator": "<", "threshold": CERT_DAYS_REMAINING_THRESHOLD, "deduction": CERT_INVALIDATING_SOON_POINT_DEDUCTION, "group": "security", "reason": "cert days remaining ({value}) < {threshold}" },
+    { "name": "responseCode", "metric": "responseStatusCode", "operator": ">", "threshold": RESPONSE_CODE_THRESHOLD, "deduction": RESPONSE_CODE_POINT_DEDUCTION, "reason": "response status > {threshold}" },
+    { "name": "ttfbPoor", "metric": "timeToFirstByte", "operator": ">", "threshold": TTFB_POOR_TIME_THRESHOLD, "deduction": TTFB_POOR_POINT_DEDUCTION, "group": "ttfb", "reason": "TTFB > {threshold}" },
+    { "name": "ttfbNeedsImprovement", "metric": "timeToFirstByte", "operator": ">", "threshold": TTFB_NEEDS_IMPROVEMENT_TIME_THRESHOLD, "deduction": TTFB_NEEDS_IMPROVEMENT_POINT_DEDUCTION, "group": "ttfb", "reason": "TTFB > {threshold}" }
+]
+
+# Step metrics rules can use. Timings are in milliseconds, straight from the execution step
+SCORING_STEP_METRICS = [
+    "responseStatusCode",
+    "totalTime",
+    "hostNameResolutionTime",
+    "tcpConnectTime",
+    "tlsHandshakeTime",
+    "timeToFirstByte"
+]
+# Derived per step: insecure (1 or 0) and certDaysRemaining
+SCORING_METRICS = SCORING_STEP_METRICS + ["insecure", "certDaysRemaining"]
+# numpy functions, looked up when scoring so numpy is only imported once there is something to score
+SCORING_OPERATORS = {
+    ">": "greater",
+    ">=": "greater_equal",
+    "<": "less",
+    "<=": "less_equal",
+    "==": "equal",
+    "!=": "not_equal"
+}
+MILLISECONDS_PER_DAY = 24 * 60 * 60 * 1000
+# A monitor runs once per location in defaultLocations. Its executions are grouped into one result
+# Every step metric is aggregated across the locations (scoringAggregate in .dynatrace/config.json) before the rules run
+# insecure is true if any location was insecure and certDaysRemaining comes from the earliest expiry
+SCORING_AGGREGATES = ["p50", "p95", "max"]
+DEFAULT_SCORING_AGGREGATE = "max"
+# Only timings are combined with scoringAggregate. A percentile of response codes is not a response code, so the highest one is kept
+MAX_AGGREGATED_METRICS = ["responseStatusCode"]
+# Report output
+# GitHub rejects comments over 65536 characters, so the table is capped below that
+DEFAULT_MAX_TABLE_ROWS = 100
+TABLE_MAX_CHARACTERS = 60000
+RESULT_STATUS_EMOJIS = {
+    "passed": ":white_check_mark:",
+    "warning": ":warning:",
+    "failed": ":x:"
+}
+RESULTS_JSONL_FILE_NAME = "results.jsonl"
+RESULTS_JUNIT_FILE_NAME = "results.xml"
+JUNIT_SUITE_NAME = "dynatrace-endpoint-evaluator"
+# Results history (see history.py). Every result is recorded in .dynatrace/.cache/history.sqlite
+# and compared with a per URL baseline that only runs on baselineBranch update
+# All of them can be overridden in .dynatrace/config.json (recordHistory, baselineBranch, regressionEwmaAlpha, regressionZThreshold and regressionMinSamples)
+HISTORY_FILE_NAME = "history.sqlite"
+DEFAULT_BASELINE_BRANCH = "main"
+DEFAULT_REGRESSION_EWMA_ALPHA = 0.2
+DEFAULT_REGRESSION_Z_THRESHOLD = 3
+DEFAULT_REGRESSION_MIN_SAMPLES = 5
+REGRESSION_EMOJI = ":chart_with_upwards_trend:"
+# (label, unit) of each metric in the report
+REGRESSION_METRIC_LABELS = {
+    "score": ("Score", "%"),
+    "timeToFirstByte": ("TTFB", "ms"),
+    "totalTime": ("Total time", "ms")
+}
+# serve mode
+# Only listens on localhost unless serveHost is set. The API has no authentication
+DEFAULT_SERVE_HOST = "127.0.0.1"
+DEFAULT_SERVE_PORT = 8080
+DEFAULT_SERVE_INTERVAL_MINUTES = 60
+
+# Where merge mode looks for the shards' results.jsonl files (eg. downloaded artifacts)
+DEFAULT_MERGE_DIRECTORY = ".dynatrace/shards"
+
+# Executions are scored in batches of (at least) this many steps as their results arrive
+SCORING_BATCH_SIZE = 1000
+# Path of a URL, for matching scoringRules.overrides
+URL_PATH_PATTERN = re.compile(r"^(?:[A-Za-z][A-Za-z0-9+.-]*:)?(?://[^/?#]*)?([^?#]*)")
+
+# Run metrics (.dynatrace/output/run_metrics.json) and their line protocol form
+# Pushed to the tenant's metrics ingest endpoint if pushRunMetrics is set in .dynatrace/config.json
+RUN_METRICS_FILE_NAME = "run_metrics.json"
+RUN_METRICS_INGEST_FILE_NAME = "run_metrics.txt"
+RUN_METRICS_KEY_PREFIX = "endpoint_evaluator"
+RUN_METRICS_PHASE_KEYS = [
+    ("wall_time", "wallSeconds"),
+    ("sleep_time", "sleepSeconds"),
+    ("work_time", "workSeconds"),
+    ("http_requests", "httpRequests"),
+    ("http_retries", "httpRetries"),
+    ("bytes_sent", "bytesSent"),
+    ("bytes_received", "bytesReceived")
+]
+
+# Profiling (see RunProfiler). Written to .dynatrace/output/profile
+PROFILE_DIRECTORY_NAME = "profile"
+PROFILE_COMBINED_FILE_NAME = "profile.prof"
+PROFILE_SUMMARY_FILE_NAME = "profile.txt"
+PROFILE_STACKS_FILE_NAME = "profile.stacks"
+PROFILE_SUMMARY_ROWS = 30
+PROFILE_SAMPLE_INTERVAL_SECONDS = 0.005
+PROFILE_MODES = ["cprofile", "sampling", "all"]
+
+# Sitemap indexes can point at other sitemap indexes. Stop following them after this many levels
+SITEMAP_MAX_DEPTH = 3
+SITEMAP_REQUEST_TIMEOUT_SECONDS = 30
+SITEMAP_CHUNK_SIZE = 64 * 1024
+# Remote sitemaps are downloaded concurrently
+# Responses with an ETag or Last-Modified header are cached in .dynatrace/.cache/sitemaps
+SITEMAP_FETCH_MAX_WORKERS = 8
+
+# Only files in .dynatrace whose content changed since the last run are parsed again
+# Their hashes and URLs are kept in .dynatrace/.cache/discovery_manifest.json
+DISCOVERY_MANIFEST_FILE_NAME = "discovery_manifest.json"
+DISCOVERY_MANIFEST_VERSION = 2
+DISCOVERY_HASH_CHUNK_SIZE = 1024 * 1024
+
+# Execution results are polled concurrently
+# At most RESULT_COLLECTOR_MAX_WORKERS fullReport requests are in flight at once
+# and every outstanding execution is polled once per poll interval
+# The interval can be overridden in .dynatrace/config.json (resultPollIntervalSeconds)
+# An execution without a result this long after polling started is given up on and reported as failed (resultCollectionTimeoutSeconds)
+RESULT_COLLECTOR_MAX_WORKERS = 20
+DEFAULT_RESULT_POLL_INTERVAL_SECONDS = 10
+DEFAULT_RESULT_COLLECTION_TIMEOUT_SECONDS = 900
+
+# Monitor creation runs concurrently but is rate limited
+# Both defaults can be overridden in .dynatrace/config.json (monitorCreationConcurrency and monitorCreationRatePerSecond)
+DEFAULT_MONITOR_CREATION_CONCURRENCY = 10
+DEFAULT_MONITOR_CREATION_RATE_PER_SECOND = 5
+
+# Every Dynatrace API call goes through one pooled HTTP session
+# Transient failures (connection errors, timeouts, 429 and 5xx responses) are retried with exponential backoff
+# POSTs (creating a monitor, triggering a batch) are not idempotent. A retry could create a duplicate,
+# so they are only retried if the request never reached Dynatrace (the connection failed) or was rejected with a 429
+# Timeout and retries can be overridden in .dynatrace/config.json (apiTimeoutSeconds and apiMaxRetries)
+DEFAULT_API_TIMEOUT_SECONDS = 30
+DEFAULT_API_MAX_RETRIES = 4
+API_BACKOFF_BASE_SECONDS = 1
+API_BACKOFF_MAX_SECONDS = 30
+# Used if a 429 response does not include a Retry-After header
+API_DEFAULT_RETRY_AFTER_SECONDS = 5
+API_RETRYABLE_STATUS_CODES = [429, 500, 502, 503, 504]
+API_NON_IDEMPOTENT_RETRYABLE_STATUS_CODES = [429]
+
+# Existing monitors are fetched from the entities API in pages of this size
+ENTITIES_PAGE_SIZE = 500
+
+# Monitor IDs are cached between runs in .dynatrace/.cache/monitor_ids.json
+# A run where every URL has a cached ID younger than the TTL skips entity discovery entirely
+# The TTL can be overridden in .dynatrace/config.json (monitorCacheTtlHours)
+MONITOR_ID_CACHE_FILE_NAME = "monitor_ids.json"
+# Bumped when the cache entries change (version 2: canonical URLs, version 3: monitor owner). A cache with another version is ignored
+MONITOR_ID_CACHE_VERSION = 3
+DEFAULT_MONITOR_CACHE_TTL_HOURS = 24
+
+# Monitors carry a hash of the body this action would create as a tag value
+# A monitor whose hash differs from the current one (eg. defaultLocations changed) is updated
+MONITOR_HASH_TAG_KEY = "git-action-hash"
+MONITOR_HASH_LENGTH = 16
+# Monitors are owned by the repository that created them (a git-action-repo tag). The owner is monitorOwner in .dynatrace/config.json,
+# otherwise GITHUB_REPOSITORY. Monitors owned by another repository are ignored
+# Only monitors owned by this repository can be stale. Untagged monitors (from older versions of the action) are matched
+# and updated, which tags them, but are never deleted
+MONITOR_OWNER_TAG_KEY = "git-action-repo"
+DEFAULT_MONITOR_OWNER = "local"
+PLAN_FILE_NAME = "plan.json"
+
+# Newly created monitors cannot be triggered until Dynatrace has synced their configuration
+# Only those monitors are retriggered, first after READINESS_INITIAL_DELAY_SECONDS and then with a growing delay
+# The timeout can be overridden in .dynatrace/config.json (monitorSyncTimeoutSeconds)
+READINESS_INITIAL_DELAY_SECONDS = 5
+READINESS_BACKOFF_MULTIPLIER = 1.5
+READINESS_MAX_DELAY_SECONDS = 30
+DEFAULT_MONITOR_SYNC_TIMEOUT_SECONDS = 600
+
+# Monitors are triggered in chunks of up to batchChunkSize (.dynatrace/config.json) per batch
+# Chunks are triggered in the background while earlier chunks are polled
+DEFAULT_BATCH_CHUNK_SIZE = 100
+BATCH_TRIGGER_MAX_WORKERS = 2
+
+# The local engine probes every URL straight from the runner instead of through Dynatrace synthetic monitors
+# Probes run concurrently on an asyncio event loop, bounded overall and per host
+# All three can be overridden in .dynatrace/config.json (localProbeConcurrency, localProbePerHostConcurrency and localProbeTimeoutSeconds)
+ENGINES = ["dynatrace", "local"]
+DEFAULT_LOCAL_PROBE_CONCURRENCY = 64
+DEFAULT_LOCAL_PROBE_PER_HOST_CONCURRENCY = 6
+DEFAULT_LOCAL_PROBE_TIMEOUT_SECONDS = 30
+
+# Ports that canonicalize_url() drops because they are implied by the scheme
+CANONICAL_DEFAULT_PORTS = { "http": 80, "https": 443 }
+
+# Only an http(s) URL with a host is absolute. Anything else (eg. /http-status) is a path below defaultRootUrl
+def ensure_full_url(input):
+    split_input = urllib.parse.urlsplit(input.strip())
+    if split_input.scheme.lower() in CANONICAL_DEFAULT_PORTS and split_input.netloc != "":
+        return input
+    if default_root_url.endswith("/") and input.startswith("/"):
+        return default_root_url+input[1:]
+    return default_root_url+input
+
+# Different spellings of the same URL are evaluated once, by a single monitor named after the canonical URL
+# Canonicalization lowercases the scheme and host, drops default ports and fragments,
+# uses / for an empty path, removes a trailing slash from any other path and sorts the query parameters
+def canonicalize_url(url):
+    split_url = urllib.parse.urlsplit(url.strip())
+    scheme = split_url.scheme.lower()
+    user_info, _, host_and_port = split_url.netloc.rpartition("@")
+    try:
+        host = split_url.hostname or ""
+        port = split_url.port
+    except ValueError:
+        # An invalid port is kept as it was written
+        host, port = host_and_port.lower(), None
+    else:
+        if ":" in host:
+            # IPv6 literal
+            host = f"[{host}]"
+        if port is not None and port != CANONICAL_DEFAULT_PORTS.get(scheme):
+            host = f"{host}:{port}"
+    netloc = f"{user_info}@{host}" if user_info != "" else host
+
+    path = split_url.path
+    if path == "" or path == "/":
+        path = "/"
+    elif path.endswith("/"):
+        path = path.rstrip("/") or "/"
+
+    query = "&".join(sorted(parameter for parameter in split_url.query.split("&") if parameter != ""))
+    return urllib.parse.urlunsplit((scheme, netloc, path, query, ""))
+
+# Returns a dictionary of canonical URL to every distinct spelling of it that was listed, in the order they were found
+# The keys are the URLs to evaluate
+def build_url_index(urls):
+    url_index = {}
+    for url in urls:
+        spellings = url_index.setdefault(canonicalize_url(url), [])
+        if url not in spellings:
+            spellings.append(url)
+    return url_index
+
+# Sitemaps are parsed incrementally so memory stays bounded however large they are
+# <sitemapindex> files are followed recursively up to SITEMAP_MAX_DEPTH levels deep
+# and gzipped sitemaps (.xml.gz) are decompressed on the fly
+def is_sitemap_url(url):
+    path = urllib.parse.urlsplit(url).path.lower()
+    file_name = path.rsplit("/", 1)[-1]
+    return "sitemap" in file_name and (file_name.endswith(".xml") or file_name.endswith(".xml.gz"))
+
+# Sitemap tags are namespaced (eg. {http://www.sitemaps.org/schemas/sitemap/0.9}loc). Only the local name matters
+def xml_local_name(tag):
+    return tag.rsplit("}", 1)[-1]
+
+# Gzip is detected from the magic bytes rather than the file name
+# because servers do not always name (or label) compressed sitemaps consistently
+def open_sitemap_stream(file_object):
+    if not hasattr(file_object, "peek"):
+        file_object = io.BufferedReader(file_object)
+    if file_object.peek(2)[:2] == b"\x1f\x8b":
+        return gzip.GzipFile(fileobj=file_object)
+    return file_object
+
+# Read only file object over an iterator of byte chunks (eg. a streamed HTTP response body)
+class ChunkStream(io.RawIOBase):
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.remaining = b""
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while len(self.remaining) == 0:
+            try:
+                self.remaining = next(self.chunks)
+            except StopIteration:
+                return 0
+            self.bytes_read += len(self.remaining)
+        size = min(len(buffer), len(self.remaining))
+        buffer[:size] = self.remaining[:size]
+        self.remaining = self.remaining[size:]
+        return size
+
+# Yield a ("url", loc) tuple for every <url> in a <urlset>
+# and a ("sitemap", loc) tuple for every <sitemap> in a <sitemapindex>
+# Only a <loc> directly inside the <url> or <sitemap> counts. Extensions nest their own (eg. <image:image><image:loc>)
+def iter_sitemap_locs(file_object):
+    # Only imported once there is a sitemap to parse
+    import xml.etree.ElementTree as ET
+
+    loc = None
+    root = None
+    # The root is depth 1, <url> and <sitemap> depth 2 and their <loc> depth 3
+    depth = 0
+    for event, element in ET.iterparse(open_sitemap_stream(file_object), events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = element
+            depth += 1
+            continue
+
+        depth -= 1
+        element_name = xml_local_name(element.tag)
+        if element_name == "loc" and depth == 2:
+            loc = (element.text or "").strip()
+        elif depth == 1 and (element_name == "url" or element_name == "sitemap"):
+            if loc:
+                yield element_name, loc
+            loc = None
+            # Drop everything parsed so far
+            root.clear()
+
+# Returns a tuple of (page_urls, child_sitemap_urls)
+# child_sitemap_urls is only populated for a <sitemapindex>
+# A malformed sitemap (invalid XML, or truncated or corrupt gzip) keeps whatever was parsed before the problem
+def read_sitemap(file_object):
+    import xml.etree.ElementTree as ET
+
+    page_urls = []
+    child_sitemap_urls = []
+    try:
+        for element_name, loc in iter_sitemap_locs(file_object):
+            # <loc> is the standard tag for an URL
+            if element_name == "url":
+                page_urls.append(ensure_full_url(loc))
+            else:
+                child_sitemap_urls.append(ensure_full_url(loc))
+    except (ET.ParseError, OSError, EOFError, zlib.error) as e:
+        print(f"Could not parse sitemap: {e}. Skipping the rest of it.")
+    return page_urls, child_sitemap_urls
+
+# The download of a remote sitemap broke off (eg. the connection dropped or timed out mid-body)
+# Deliberately not an OSError, so read_sitemap() does not mistake it for a malformed sitemap
+class SitemapDownloadError(Exception):
+    pass
+
+# The body of a sitemap response in chunks. Errors while streaming it raise SitemapDownloadError
+def iter_sitemap_chunks(url_response):
+    import requests
+
+    try:
+        yield from url_response.iter_content(chunk_size=SITEMAP_CHUNK_SIZE)
+    except requests.exceptions.RequestException as e:
+        raise SitemapDownloadError(e) from e
+
+def get_sitemap_cache_path(url):
+    return f"{sitemap_cache_directory}/{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+
+# Download and parse a single remote sitemap
+# If the server sent an ETag or Last-Modified header last time, a conditional GET is made
+# and an unchanged sitemap (304) is served from the cache without re-downloading or re-parsing it
+# Returns a tuple of (page_urls, child_sitemap_urls)
+def fetch_sitemap(url):
+    cache_path = get_sitemap_cache_path(url)
+    cached_sitemap = None
+    try:
+        with open(cache_path) as cache_file:
+            cached_sitemap = json.load(cache_file)
+    except (OSError, ValueError):
+        pass
+
+    conditional_headers = {}
+    if cached_sitemap is not None:
+        if cached_sitemap.get('etag'):
+            conditional_headers['If-None-Match'] = cached_sitemap['etag']
+        if cached_sitemap.get('lastModified'):
+            conditional_headers['If-Modified-Since'] = cached_sitemap['lastModified']
+
+    try:
+        url_response = sitemap_session.get(url, headers=conditional_headers, stream=True, timeout=SITEMAP_REQUEST_TIMEOUT_SECONDS)
+    except:
+        run_metrics.record_http()
+        print(f"Exception caught unpacking {url}. Exit safely.")
+        return [], []
+
+    with url_response:
+        if url_response.status_code != 200:
+            run_metrics.record_http()
+
+        if url_response.status_code == 304 and cached_sitemap is not None:
+            print(f"{url} is unchanged. Using cached URLs.")
+            return cached_sitemap['pageUrls'], cached_sitemap['childSitemapUrls']
+
+        if url_response.status_code != 200:
+            return [], []
+
+        # iter_content undoes any Content-Encoding before the XML parser sees the bytes
+        # A download that breaks off yields nothing and is not cached, so the next run fetches it again
+        sitemap_stream = ChunkStream(iter_sitemap_chunks(url_response))
+        try:
+            page_urls, child_sitemap_urls = read_sitemap(sitemap_stream)
+        except SitemapDownloadError as e:
+            run_metrics.record_http(bytes_received=sitemap_stream.bytes_read)
+            print(f"Exception caught downloading {url}: {e}. Exit safely.")
+            return [], []
+        run_metrics.record_http(bytes_received=sitemap_stream.bytes_read)
+        etag = url_response.headers.get('ETag')
+        last_modified = url_response.headers.get('Last-Modified')
+
+    if etag or last_modified:
+        os.makedirs(sitemap_cache_directory, exist_ok=True)
+        temporary_path = f"{cache_path}.tmp"
+        with open(temporary_path, "w") as cache_file:
+            json.dump({
+                "url": url,
+                "etag": etag,
+                "lastModified": last_modified,
+                "pageUrls": page_urls,
+                "childSitemapUrls": child_sitemap_urls
+            }, cache_file)
+        os.replace(temporary_path, cache_path)
+
+    return page_urls, child_sitemap_urls
+
+# Used in special cases if the URL input is a link to a file
+# Currently supported: sitemap.xml files (optionally gzipped, optionally a sitemap index)
+# Download the URL content and parse each URL inside the sitemap.xml
+# Meaning we allow users to list https://example.com/sitemap.xml inside the .dynatrace/urls.txt
+# Then the <loc> URLs INSIDE the sitemap will actually also be checked
+#
+# Every sitemap at the same level is fetched concurrently
+# Child sitemaps of an index form the next level, up to SITEMAP_MAX_DEPTH levels deep
+# Returns the page URLs from every sitemap
+def unpack_sitemaps(sitemap_urls):
+    url_return_list = []
+    visited_sitemap_urls = set(sitemap_urls)
+    sitemap_level = list(visited_sitemap_urls)
+    depth = 0
+
+    with ThreadPoolExecutor(max_workers=SITEMAP_FETCH_MAX_WORKERS) as executor:
+        while len(sitemap_level) > 0:
+            next_sitemap_level = []
+            for page_urls, child_sitemap_urls in executor.map(fetch_sitemap, sitemap_level):
+                url_return_list.extend(page_urls)
+                for child_sitemap_url in child_sitemap_urls:
+                    if child_sitemap_url in visited_sitemap_urls:
+                        continue
+                    if depth >= SITEMAP_MAX_DEPTH:
+                        print(f"Not following {child_sitemap_url}. Sitemap indexes are only followed {SITEMAP_MAX_DEPTH} level(s) deep.")
+                        continue
+                    visited_sitemap_urls.add(child_sitemap_url)
+                    next_sitemap_level.append(child_sitemap_url)
+            sitemap_level = next_sitemap_level
+            depth += 1
+
+    return url_return_list
+
+def get_execution_full_report(execution_id):
+    with run_metrics.span("result_polling"):
+        return fetch_execution_full_report(execution_id)
+
+# The fullReport of an execution will never be available (eg. an unknown execution ID or a token without permission)
+class ExecutionResultError(Exception):
+    pass
+
+# 429 and 5xx responses have already been retried by the client. Other 4xx responses will not get better
+def fetch_execution_full_report(execution_id):
+    execution_details_response = dynatrace_client.get(
+        f"/api/v2/synthetic/executions/{execution_id}/fullReport",
+        call_name="get_execution_full_report"
+    )
+    if 400 <= execution_details_response.status_code < 500 and execution_details_response.status_code not in API_RETRYABLE_STATUS_CODES:
+        raise ExecutionResultError(f"Getting its fullReport returned {execution_details_response.status_code}: {execution_details_response.text[:200]}")
+    execution_details_response.raise_for_status()
+    return execution_details_response.json()
+
+# Poll every outstanding execution concurrently and yield each fullReport
+# as soon as its executionStage reaches DATA_RETRIEVED.
+# Executions that are not ready yet stay in the pending list and are polled again next round
+# so total collection time is close to the slowest single execution rather than the sum of all of them
+#
+# Executions arrive from trigger_futures (one per chunk) while earlier executions are already being polled
+# on_triggered is called in this thread with the result of each finished trigger future
+# and must return the executions to start polling as { "executionId", "monitorId", "locationId", "url" }
+#
+# Executions whose fullReport cannot be retrieved, or that have no result resultCollectionTimeoutSeconds after polling started,
+# are dropped. They are yielded as their triggered execution with a "missingReason", so their monitor's result still completes
+def collect_execution_results(trigger_futures, on_triggered):
+    pending_execution_ids = []
+    triggered_executions = {}
+    execution_deadlines = {}
+    execution_stages = {}
+    outstanding_trigger_futures = set(trigger_futures)
+
+    with ThreadPoolExecutor(max_workers=RESULT_COLLECTOR_MAX_WORKERS) as executor:
+        while len(pending_execution_ids) > 0 or len(outstanding_trigger_futures) > 0:
+            # Pick up every chunk that has finished triggering since the last round
+            # If there is nothing to poll yet, block until the next chunk is triggered
+            if len(pending_execution_ids) == 0:
+                wait(outstanding_trigger_futures, return_when=FIRST_COMPLETED)
+            for trigger_future in [future for future in outstanding_trigger_futures if future.done()]:
+                outstanding_trigger_futures.remove(trigger_future)
+                for triggered_execution in on_triggered(trigger_future.result()):
+                    execution_id = triggered_execution['executionId']
+                    triggered_executions[execution_id] = triggered_execution
+                    execution_deadlines[execution_id] = time.monotonic() + result_collection_timeout_seconds
+                    pending_execution_ids.append(execution_id)
+
+            if len(pending_execution_ids) == 0:
+                continue
+
+            print(f"Waiting {result_poll_interval_seconds}s before polling {len(pending_execution_ids)} outstanding execution(s)...")
+            run_metrics.sleep(result_poll_interval_seconds)
+
+            futures = { executor.submit(get_execution_full_report, execution_id): execution_id for execution_id in pending_execution_ids }
+            still_pending_execution_ids = []
+
+            for future in as_completed(futures):
+                execution_id = futures[future]
+                try:
+                    execution_details_response_json = future.result()
+                    execution_status = execution_details_response_json['executionStage']
+                except ExecutionResultError as e:
+                    print(f"Giving up on {execution_id}. {e}")
+                    yield dict(triggered_executions[execution_id], missingReason=f"Execution {execution_id}: {e}")
+                    continue
+                except Exception as e:
+                    # Treat as transient and poll again next round
+                    print(f"Exception caught retrieving fullReport for {execution_id}: {e}. Will try again.")
+                    still_pending_execution_ids.append(execution_id)
+                    continue
+
+                # "executionStage" can be:
+                # TRIGGERED = triggered but nothing else has happened yet
+                # EXECUTED but also check the fullResults.status as it could be FAILED
+                # DATA_RETRIEVED with fullResults.status is SUCCESS is the best case scenario
+                # Strangely "executionStage" remains TRIGGERED and fullResults.status is SUCCESS
+                # But len(executionSteps) is zero if the URL doesn't exist
+                if execution_status == "DATA_RETRIEVED":
+                    print(f"Got results for {execution_id}.")
+                    yield execution_details_response_json
+                else:
+                    execution_stages[execution_id] = execution_status
+                    still_pending_execution_ids.append(execution_id)
+
+            # Polling stops for executions that are past their deadline (eg. stuck in TRIGGERED)
+            now = time.monotonic()
+            pending_execution_ids = []
+            for execution_id in still_pending_execution_ids:
+                if now < execution_deadlines[execution_id]:
+                    pending_execution_ids.append(execution_id)
+                    continue
+                reason = f"No result after {result_collection_timeout_seconds}s (last executionStage: {execution_stages.get(execution_id, 'unknown')})"
+                print(f"Giving up on {execution_id}. {reason}")
+                yield dict(triggered_executions[execution_id], missingReason=f"Execution {execution_id}: {reason}")
+
+# The monitor is named after the canonical URL (endpoint) but requests a URL as it was listed (request_url)
+# as the canonical form can point at another resource (eg. "/api/" and "/api")
+def build_monitor_body(endpoint, request_url):
+    body = {
+        "name": endpoint,
+	    "frequencyMin": 0,
+	    "enabled": True,
+	    "type": "HTTP",
+	    "createdFrom": "API",
+	    "script": {
+    		"version": "1.0",
+		    "requests": [{
+    			"description": endpoint,
+			    "url": request_url,
+			    "method": "GET",
+			    "validation": {
+    				"rules": [{
+					    "value": ">=400",
+					    "passIfFound": False,
+					    "type": "httpStatusesList"
+				    }]
+			    },
+			    "configuration": {
+    				"acceptAnyCertificate": True,
+				    "followRedirects": True,
+				    "shouldNotPersistSensitiveData": True
+			    }
+		    }]
+	    },
+	    "locations": default_locations,
+    	"anomalyDetection": {
+		    "outageHandling": {
+    			"globalOutage": True,
+			    "globalOutagePolicy": {
+    				"consecutiveRuns": 1
+			    },
+			    "localOutage": False,
+			    "localOutagePolicy": {
+    				"affectedLocations": None,
+				    "consecutiveRuns": None
+			    }
+		    },
+		    "loadingTimeThresholds": {
+    			"enabled": True,
+			    "thresholds": []
+		    }
+	    },
+	    "tags": [{
+    		"source": "USER",
+		    "context": "CONTEXTLESS",
+		    "key": "git-action"
+	    }, {
+    		"source": "USER",
+		    "context": "CONTEXTLESS",
+		    "key": MONITOR_OWNER_TAG_KEY,
+		    "value": monitor_owner
+	    }],
+	    "managementZones": [],
+	    "automaticallyAssignedApps": [],
+	    "manuallyAssignedApps": [],
+	    "requests": []
+    }
+    return body
+
+# Hash of everything this action sets on a monitor
+def get_monitor_body_hash(body):
+    return hashlib.sha256(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()[:MONITOR_HASH_LENGTH]
+
+# The monitor body this action wants for an endpoint, tagged with its own hash
+# Returns a tuple of (body, body_hash)
+def build_desired_monitor_body(endpoint, request_url):
+    body = build_monitor_body(endpoint, request_url)
+    body_hash = get_monitor_body_hash(body)
+    body['tags'].append({
+        "source": "USER",
+        "context": "CONTEXTLESS",
+        "key": MONITOR_HASH_TAG_KEY,
+        "value": body_hash
+    })
+    return body, body_hash
+
+# Per-phase timing and counters for the evaluator's own performance
+# The main thread moves through the phases of a run in order with start_phase()
+# Work done on other threads is attributed to the current main phase unless it is wrapped in span()
+# Spans can overlap their main phase (eg. scoring happens during result_collection)
+class RunMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # Keyed by thread ident (rather than a threading.local) so the sampling profiler can see every thread's phase
+        self.thread_phases = {}
+        self.profiler = None
+        self.reset()
+
+    # Start again for the next evaluation (serve mode)
+    def reset(self):
+        with self.lock:
+            self.phases = {}
+            self.started_at = datetime.datetime.now(datetime.timezone.utc)
+            self.start_time = time.perf_counter()
+            self.main_phase = None
+            self.main_phase_start_time = None
+            self.counters = {}
+
+    def get_phase(self, phase_name):
+        if phase_name not in self.phases:
+            self.phases[phase_name] = {
+                "wallSeconds": 0,
+                "sleepSeconds": 0,
+                "httpRequests": 0,
+                "httpRetries": 0,
+                "bytesSent": 0,
+                "bytesReceived": 0
+            }
+        return self.phases[phase_name]
+
+    def add(self, phase_name, key, value):
+        with self.lock:
+            self.get_phase(phase_name)[key] += value
+
+    def start_phase(self, phase_name):
+        now = time.perf_counter()
+        with self.lock:
+            if self.main_phase is not None:
+                self.get_phase(self.main_phase)['wallSeconds'] += now - self.main_phase_start_time
+            self.main_phase = phase_name
+            self.main_phase_start_time = now
+            if phase_name is not None:
+                self.get_phase(phase_name)
+        if self.profiler is not None:
+            self.profiler.switch_phase(phase_name)
+
+    def thread_phase(self, thread_id):
+        return self.thread_phases.get(thread_id) or self.main_phase or "startup"
+
+    def active_phase(self):
+        return self.thread_phase(threading.get_ident())
+
+    @contextlib.contextmanager
+    def span(self, phase_name):
+        thread_id = threading.get_ident()
+        previous_phase = self.thread_phases.get(thread_id)
+        self.thread_phases[thread_id] = phase_name
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase_name, "wallSeconds", time.perf_counter() - start_time)
+            if previous_phase is None:
+                self.thread_phases.pop(thread_id, None)
+            else:
+                self.thread_phases[thread_id] = previous_phase
+
+    def record_http(self, is_retry=False, bytes_sent=0, bytes_received=0):
+        phase_name = self.active_phase()
+        with self.lock:
+            phase = self.get_phase(phase_name)
+            phase['httpRequests'] += 1
+            if is_retry:
+                phase['httpRetries'] += 1
+            phase['bytesSent'] += bytes_sent
+            phase['bytesReceived'] += bytes_received
+
+    # Use instead of time.sleep() so waiting is told apart from working
+    def sleep(self, seconds):
+        if seconds <= 0:
+            return
+        self.add(self.active_phase(), "sleepSeconds", seconds)
+        time.sleep(seconds)
+
+    def set_counter(self, counter_name, value):
+        with self.lock:
+            self.counters[counter_name] = value
+
+    def to_json(self):
+        with self.lock:
+            phases = {}
+            for phase_name, phase in self.phases.items():
+                wall_seconds = phase['wallSeconds']
+                if phase_name == self.main_phase:
+                    wall_seconds += time.perf_counter() - self.main_phase_start_time
+                phases[phase_name] = dict(
+                    phase,
+                    wallSeconds=round(wall_seconds, 3),
+                    sleepSeconds=round(phase['sleepSeconds'], 3),
+                    workSeconds=round(max(0, wall_seconds - phase['sleepSeconds']), 3)
+                )
+            return {
+                "startedAt": self.started_at.isoformat(),
+                "totalSeconds": round(time.perf_counter() - self.start_time, 3),
+                "counters": dict(self.counters),
+                "phases": phases
+            }
+
+# Opt-in profiler for large runs. Enabled with DT_EVALUATOR_PROFILE or the action's profile input
+# "cprofile": deterministic profile of the main thread with one profile per phase
+# "sampling": samples the stacks of every thread, tagged with the phase each thread is working on
+# "all": both
+# cprofile slows the run down noticeably. The sampler is cheap enough to leave on for a 50k URL run
+class RunProfiler:
+    def __init__(self, profile_mode, run_metrics):
+        self.run_metrics = run_metrics
+        self.phase_profiles = {}
+        self.current_profile = None
+        self.use_cprofile = profile_mode in ["cprofile", "all"]
+        self.use_sampling = profile_mode in ["sampling", "all"]
+        self.stack_counts = {}
+        self.sample_count = 0
+        self.stop_sampling = threading.Event()
+        self.sampler_thread = None
+
+    def start(self):
+        if self.use_cprofile:
+            self.switch_phase(self.run_metrics.main_phase or "startup")
+        if self.use_sampling:
+            self.sampler_thread = threading.Thread(target=self.sample, name="profile-sampler", daemon=True)
+            self.sampler_thread.start()
+
+    # cProfile only sees the thread that enabled it, so the main thread swaps profiles when the phase changes
+    def switch_phase(self, phase_name):
+        if not self.use_cprofile:
+            return
+        if self.current_profile is not None:
+            self.current_profile.disable()
+            self.current_profile = None
+        if phase_name is None:
+            return
+        if phase_name not in self.phase_profiles:
+            import cProfile
+            self.phase_profiles[phase_name] = cProfile.Profile()
+        self.current_profile = self.phase_profiles[phase_name]
+        self.current_profile.enable()
+
+    def sample(self):
+        sampler_thread_id = threading.get_ident()
+        while not self.stop_sampling.wait(PROFILE_SAMPLE_INTERVAL_SECONDS):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == sampler_thread_id:
+                    continue
+                # Idle executor workers wait for work inside a C call, so their innermost Python frame is _worker
+                if frame.f_code.co_name == "_worker" and frame.f_code.co_filename.endswith(os.path.join("concurrent", "futures", "thread.py")):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+                    frame = frame.f_back
+                stack.append(self.run_metrics.thread_phase(thread_id))
+                # Collapsed stack format: root first, frames separated by ";"
+                collapsed_stack = ";".join(reversed(stack))
+                self.stack_counts[collapsed_stack] = self.stack_counts.get(collapsed_stack, 0) + 1
+            self.sample_count += 1
+
+    def stop(self):
+        self.switch_phase(None)
+        if self.sampler_thread is not None:
+            self.stop_sampling.set()
+            self.sampler_thread.join()
+            self.sampler_thread = None
+
+    def write(self, directory):
+        import pstats
+
+        os.makedirs(directory, exist_ok=True)
+        written_files = []
+
+        if len(self.phase_profiles) > 0:
+            combined_stats = None
+            with open(f"{directory}/{PROFILE_SUMMARY_FILE_NAME}", "w") as summary_file:
+                for phase_name, phase_profile in self.phase_profiles.items():
+                    phase_profile.dump_stats(f"{directory}/profile_{phase_name}.prof")
+                    written_files.append(f"profile_{phase_name}.prof")
+                    summary_file.write(f"==== {phase_name} ====\n")
+                    phase_stats = pstats.Stats(phase_profile, stream=summary_file)
+                    phase_stats.sort_stats("cumulative").print_stats(PROFILE_SUMMARY_ROWS)
+                    if combined_stats is None:
+                        combined_stats = pstats.Stats(phase_profile)
+                    else:
+                        combined_stats.add(phase_profile)
+            combined_stats.dump_stats(f"{directory}/{PROFILE_COMBINED_FILE_NAME}")
+            written_files.extend([PROFILE_COMBINED_FILE_NAME, PROFILE_SUMMARY_FILE_NAME])
+
+        if self.sample_count > 0:
+            with open(f"{directory}/{PROFILE_STACKS_FILE_NAME}", "w") as stacks_file:
+                for collapsed_stack, count in sorted(self.stack_counts.items()):
+                    stacks_file.write(f"{collapsed_stack} {count}\n")
+            written_files.append(PROFILE_STACKS_FILE_NAME)
+
+        print(f"Profile written to {directory}: {', '.join(written_files)}")
+
+# Dynatrace metrics ingest line protocol for a run's metrics
+# https://www.dynatrace.com/support/help/extend-dynatrace/extend-metrics/reference/metric-ingestion-protocol
+def build_metrics_ingest_payload(run_metrics_json, repository=""):
+    common_dimensions = ""
+    if repository != "":
+        common_dimensions = f',repository="{repository}"'
+
+    lines = [f"{RUN_METRICS_KEY_PREFIX}.run.duration{common_dimensions} {run_metrics_json['totalSeconds']}"]
+    for counter_name, value in sorted(run_metrics_json['counters'].items()):
+        lines.append(f"{RUN_METRICS_KEY_PREFIX}.run.{counter_name}{common_dimensions} {value}")
+    for phase_name, phase in run_metrics_json['phases'].items():
+        for metric_name, phase_key in RUN_METRICS_PHASE_KEYS:
+            lines.append(f"{RUN_METRICS_KEY_PREFIX}.phase.{metric_name},phase={phase_name}{common_dimensions} {phase[phase_key]}")
+    return "\n".join(lines) + "\n"
+
+def export_profile():
+    if run_metrics.profiler is None:
+        return
+    run_metrics.profiler.stop()
+    try:
+        run_metrics.profiler.write(f"{output_directory}/{PROFILE_DIRECTORY_NAME}")
+    except OSError as e:
+        print(f"Could not write profile: {e}")
+
+# Write the run metrics (and optionally push them to the tenant) however the run ends
+def export_run_metrics():
+    run_metrics.start_phase(None)
+    run_metrics_json = run_metrics.to_json()
+    if dynatrace_client is not None:
+        run_metrics_json['api'] = dynatrace_client.stats_summary()
+    metrics_ingest_payload = build_metrics_ingest_payload(run_metrics_json, os.getenv("GITHUB_REPOSITORY", ""))
+
+    try:
+        os.makedirs(output_directory, exist_ok=True)
+        with open(f"{output_directory}/{RUN_METRICS_FILE_NAME}", "w") as run_metrics_file:
+            json.dump(run_metrics_json, run_metrics_file, indent=2)
+        with open(f"{output_directory}/{RUN_METRICS_INGEST_FILE_NAME}", "w") as ingest_file:
+            ingest_file.write(metrics_ingest_payload)
+    except OSError as e:
+        print(f"Could not write run metrics: {e}")
+
+    print("-- Run metrics --")
+    for phase_name, phase in run_metrics_json['phases'].items():
+        print(f"  {phase_name}: {phase['wallSeconds']}s ({phase['sleepSeconds']}s sleeping). {phase['httpRequests']} HTTP request(s), {phase['httpRetries']} retried")
+
+    if push_run_metrics and dynatrace_client is not None:
+        import requests
+
+        try:
+            ingest_response = dynatrace_client.post(
+                "/api/v2/metrics/ingest",
+                call_name="ingest_run_metrics",
+                data=metrics_ingest_payload.encode("utf-8"),
+                headers={ "Content-Type": "text/plain; charset=utf-8" }
+            )
+            if ingest_response.status_code != 202:
+                print(f"Run metrics were not accepted. Response code: {ingest_response.status_code}. Text: {ingest_response.text}")
+        except requests.exceptions.RequestException as e:
+            print(f"Exception caught pushing run metrics: {e}")
+
+# Simple thread safe token bucket
+# Tokens refill at rate_per_second up to capacity. acquire() blocks until a token is available
+# pause() stops handing out tokens until the given number of seconds has passed (eg. when the API sends Retry-After)
+class TokenBucket:
+    def __init__(self, rate_per_second, capacity):
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self.paused_until = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now >= self.paused_until:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate_per_second)
+                    self.last_refill = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait_time = (1 - self.tokens) / self.rate_per_second
+                else:
+                    wait_time = self.paused_until - now
+            run_metrics.sleep(wait_time)
+
+    def pause(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+            self.last_refill = self.paused_until
+
+# Retry-After can be a number of seconds or an HTTP date
+def parse_retry_after(retry_after_header, default_seconds):
+    if retry_after_header is None or retry_after_header == "":
+        return default_seconds
+    try:
+        return max(0, float(retry_after_header))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(retry_after_header)
+        return max(0, (retry_at - datetime.datetime.now(retry_at.tzinfo)).total_seconds())
+    except (TypeError, ValueError):
+        return default_seconds
+
+# Create a single HTTP_CHECK monitor
+# Returns a tuple of (monitor_id, error). Exactly one of them is None
+def create_monitor(endpoint, request_url, bucket):
+    import requests
+
+    try:
+        create_synthetic_response = dynatrace_client.post(
+            "/api/v1/synthetic/monitors",
+            call_name="create_monitor",
+            bucket=bucket,
+            json=build_desired_monitor_body(endpoint, request_url)[0]
+        )
+    except requests.exceptions.RequestException as e:
+        return None, f"Exception caught creating synthetic: {e}"
+
+    if create_synthetic_response.status_code != 200:
+        return None, f"Response code: {create_synthetic_response.status_code}. Text: {create_synthetic_response.text}"
+
+    return create_synthetic_response.json()['entityId'], None
+
+# Replace the settings of an existing monitor with the desired body
+# Returns an error message or None
+def update_monitor(monitor_id, endpoint, request_url, bucket):
+    import requests
+
+    try:
+        update_synthetic_response = dynatrace_client.put(
+            f"/api/v1/synthetic/monitors/{monitor_id}",
+            call_name="update_monitor",
+            bucket=bucket,
+            json=build_desired_monitor_body(endpoint, request_url)[0]
+        )
+    except requests.exceptions.RequestException as e:
+        return f"Exception caught updating synthetic: {e}"
+
+    if update_synthetic_response.status_code != 204:
+        return f"Response code: {update_synthetic_response.status_code}. Text: {update_synthetic_response.text}"
+    return None
+
+# Returns an error message or None. A monitor that is already gone counts as deleted
+def delete_monitor(monitor_id, bucket):
+    import requests
+
+    try:
+        delete_synthetic_response = dynatrace_client.delete(
+            f"/api/v1/synthetic/monitors/{monitor_id}",
+            call_name="delete_monitor",
+            bucket=bucket
+        )
+    except requests.exceptions.RequestException as e:
+        return f"Exception caught deleting synthetic: {e}"
+
+    if delete_synthetic_response.status_code not in [204, 404]:
+        return f"Response code: {delete_synthetic_response.status_code}. Text: {delete_synthetic_response.text}"
+    return None
+
+# Apply one change of the reconciliation plan
+# Returns a tuple of (monitor_id, error)
+def apply_monitor_change(change, bucket):
+    if change['action'] == "create":
+        return create_monitor(change['url'], change['requestUrl'], bucket)
+    if change['action'] == "update":
+        return change['monitorId'], update_monitor(change['monitorId'], change['url'], change['requestUrl'], bucket)
+    return change['monitorId'], delete_monitor(change['monitorId'], bucket)
+
+# True if the request failed before it was sent (the connection could not be established), so retrying cannot duplicate it
+def is_not_sent_error(error):
+    import requests
+    import urllib3
+
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.exceptions.ConnectionError) or len(error.args) == 0:
+        return False
+    # requests wraps urllib3's MaxRetryError, whose reason is the underlying error
+    reason = getattr(error.args[0], "reason", error.args[0])
+    return isinstance(reason, (urllib3.exceptions.NewConnectionError, urllib3.exceptions.ConnectTimeoutError))
+
+# Thin wrapper around a pooled requests.Session used for every Dynatrace API call
+# Keeps connections alive between calls, applies a timeout to every request,
+# retries transient failures with exponential backoff and records request counts and latencies per call
+# requests is imported when the client is created, so runs that never call Dynatrace (eg. merge) do not load it
+class DynatraceClient:
+    def __init__(self, environment_url, api_token, pool_size, timeout, max_retries):
+        import requests
+        import requests.adapters
+
+        self.environment_url = environment_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Api-Token {api_token}"
+        })
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.stats_lock = threading.Lock()
+        self.request_count = 0
+        self.retry_count = 0
+        self.latencies = {}
+
+    def get(self, path, call_name, **kwargs):
+        return self.request("GET", path, call_name, **kwargs)
+
+    def post(self, path, call_name, **kwargs):
+        return self.request("POST", path, call_name, **kwargs)
+
+    def put(self, path, call_name, **kwargs):
+        return self.request("PUT", path, call_name, **kwargs)
+
+    def delete(self, path, call_name, **kwargs):
+        return self.request("DELETE", path, call_name, **kwargs)
+
+    # Returns the response of the last attempt
+    # Raises the last requests exception if every attempt failed without a response
+    # If a TokenBucket is given, a token is taken before every attempt and a 429 pauses the whole bucket
+    # idempotent defaults to True for every method but POST (see API_NON_IDEMPOTENT_RETRYABLE_STATUS_CODES)
+    def request(self, method, path, call_name, timeout=None, bucket=None, idempotent=None, **kwargs):
+        import requests
+
+        url = f"{self.environment_url}{path}"
+        if timeout is None:
+            timeout = self.timeout
+        if idempotent is None:
+            idempotent = method != "POST"
+        retryable_status_codes = API_RETRYABLE_STATUS_CODES if idempotent else API_NON_IDEMPOTENT_RETRYABLE_STATUS_CODES
+
+        for attempt in range(self.max_retries + 1):
+            is_last_attempt = attempt == self.max_retries
+            if bucket is not None:
+                bucket.acquire()
+
+            start_time = time.perf_counter()
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                # The outcome of a request that may have been sent is unknown. Only retry it if that is safe
+                is_retryable = idempotent or is_not_sent_error(e)
+                self.record(call_name, time.perf_counter() - start_time, is_retry=is_retryable and not is_last_attempt)
+                run_metrics.record_http(is_retry=is_retryable and not is_last_attempt)
+                if is_last_attempt or not is_retryable:
+                    raise
+                backoff = self.backoff_seconds(attempt)
+                print(f"{call_name}: {e.__class__.__name__} calling {path}. Retrying in {backoff:.1f}s (attempt {attempt + 1} of {self.max_retries + 1})")
+                run_metrics.sleep(backoff)
+                continue
+
+            is_retryable = response.status_code in retryable_status_codes
+            self.record(call_name, time.perf_counter() - start_time, is_retry=is_retryable and not is_last_attempt)
+            run_metrics.record_http(
+                is_retry=is_retryable and not is_last_attempt,
+                bytes_sent=len(response.request.body or b""),
+                bytes_received=len(response.content)
+            )
+            if not is_retryable or is_last_attempt:
+                return response
+
+            if response.status_code == 429:
+                backoff = parse_retry_after(response.headers.get("Retry-After"), API_DEFAULT_RETRY_AFTER_SECONDS)
+            else:
+                backoff = self.backoff_seconds(attempt)
+            print(f"{call_name}: got {response.status_code} calling {path}. Retrying in {backoff:.1f}s (attempt {attempt + 1} of {self.max_retries + 1})")
+            if bucket is not None and response.status_code == 429:
+                bucket.pause(backoff)
+            else:
+                run_metrics.sleep(backoff)
+
+    def backoff_seconds(self, attempt):
+        backoff = min(API_BACKOFF_MAX_SECONDS, API_BACKOFF_BASE_SECONDS * (2 ** attempt))
+        # Add jitter so concurrent workers do not retry in lockstep
+        return backoff * random.uniform(0.5, 1)
+
+    def record(self, call_name, elapsed_seconds, is_retry):
+        with self.stats_lock:
+            self.request_count += 1
+            if is_retry:
+                self.retry_count += 1
+            self.latencies.setdefault(call_name, []).append(elapsed_seconds)
+
+    def stats_summary(self):
+        with self.stats_lock:
+            calls = {}
+            for call_name, latencies in sorted(self.latencies.items()):
+                sorted_latencies = sorted(latencies)
+                calls[call_name] = {
+                    "requests": len(latencies),
+                    "avgMs": round(sum(latencies) / len(latencies) * 1000),
+                    "p95Ms": round(sorted_latencies[min(len(sorted_latencies) - 1, int(len(sorted_latencies) * 0.95))] * 1000),
+                    "maxMs": round(sorted_latencies[-1] * 1000)
+                }
+            return {
+                "requests": self.request_count,
+                "retries": self.retry_count,
+                "calls": calls
+            }
+
+    def print_stats(self):
+        stats_summary = self.stats_summary()
+        print(f"Dynatrace API: {stats_summary['requests']} request(s), {stats_summary['retries']} retried")
+        for call_name, call_stats in stats_summary['calls'].items():
+            print(f"  {call_name}: {call_stats['requests']} request(s). Avg: {call_stats['avgMs']}ms. p95: {call_stats['p95Ms']}ms. Max: {call_stats['maxMs']}ms")
+
+class ExistingSyntheticsError(Exception):
+    pass
+
+# Stream every HTTP_CHECK tagged with `git-action`, one page at a time
+# The first request carries the selector. Follow-up requests must only send nextPageKey
+# entityId and displayName are in the default field set. Tags are needed for the body hash
+def iter_existing_synthetics():
+    params = {
+        "entitySelector": "type(HTTP_CHECK),tag(git-action)",
+        "fields": "+tags",
+        "pageSize": ENTITIES_PAGE_SIZE
+    }
+
+    while True:
+        get_existing_synthetics_response = dynatrace_client.get(
+            "/api/v2/entities",
+            call_name="get_existing_synthetics",
+            params=params
+        )
+
+        if get_existing_synthetics_response.status_code != 200:
+            raise ExistingSyntheticsError(f"Couldn't get existing synthetics. Response code: {get_existing_synthetics_response.status_code}.")
+
+        existing_synthetics_json = get_existing_synthetics_response.json()
+        for existing_synthetic_http_check in existing_synthetics_json['entities']:
+            yield existing_synthetic_http_check
+
+        next_page_key = existing_synthetics_json.get('nextPageKey')
+        if next_page_key is None:
+            return
+        params = { "nextPageKey": next_page_key }
+
+# The value of an entity's tag, or None if it does not have the tag
+def get_entity_tag_value(entity, tag_key):
+    for tag in entity.get('tags', []):
+        if tag.get('key') == tag_key:
+            return tag.get('value')
+    return None
+
+# The git-action-hash tag value of an entity, or None (eg. monitors created before the hash existed)
+def get_entity_body_hash(entity):
+    return get_entity_tag_value(entity, MONITOR_HASH_TAG_KEY)
+
+# Returns a dictionary of canonical URL to { "monitorId": ..., "bodyHash": ..., "owner": ..., "validatedAt": <epoch seconds> }
+# A missing, unreadable or outdated cache is treated as empty
+def load_monitor_id_cache():
+    try:
+        with open(monitor_id_cache_path) as cache_file:
+            monitor_id_cache = json.load(cache_file)
+        if monitor_id_cache['version'] != MONITOR_ID_CACHE_VERSION:
+            return {}
+        return monitor_id_cache['monitors']
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+def save_monitor_id_cache(monitor_id_cache):
+    os.makedirs(cache_directory, exist_ok=True)
+    # Write to a temporary file first so an interrupted run never leaves a half written cache
+    temporary_path = f"{monitor_id_cache_path}.tmp"
+    with open(temporary_path, "w") as cache_file:
+        json.dump({ "version": MONITOR_ID_CACHE_VERSION, "monitors": monitor_id_cache }, cache_file)
+    os.replace(temporary_path, monitor_id_cache_path)
+
+class BatchFailedError(Exception):
+    pass
+
+def get_batch(batch_id):
+    get_batch_response = dynatrace_client.get(
+        f"/api/v2/synthetic/executions/batch/{batch_id}",
+        call_name="get_batch"
+    )
+    return get_batch_response.json()
+
+def trigger_batch(monitor_ids):
+    body = {
+        "processingMode": "EXECUTIONS_DETAILS_ONLY",
+        "failOnPerformanceIssue": "false",
+        "stopOnProblem": "false",
+        "monitors": [{ "monitorId": monitor_id } for monitor_id in monitor_ids],
+        "group": {}
+    }
+    batch_execution_response = dynatrace_client.post(
+        "/api/v2/synthetic/executions/batch",
+        call_name="trigger_batch",
+        json=body
+    )
+    print(f"Batch Trigger Response Code: {batch_execution_response.status_code}")
+    return batch_execution_response.json()
+
+# Trigger the given monitors and keep retriggering only the ones that are still syncing
+# Known causes of triggering problems:
+# 1. A new monitor has just been created and is not yet synced. In which case the batch will NOT auto-trigger, so we need to take care of that
+#    Detect that by looking at the cause of each triggering problem. It will be: "Monitor's confiuguration is being synchronized. Please try in a moment."
+# 2. The monitor no longer exists (eg. it was deleted but its ID is still cached)
+#
+# Syncing monitors are retried with an adaptive backoff (short at first, growing up to READINESS_MAX_DELAY_SECONDS)
+# until monitor_sync_timeout_seconds has passed
+# Returns a tuple of:
+#   triggered: list of { "monitorId": ..., "executions": [...] } across every batch
+#   rejected: dictionary of monitor_id to cause for monitors that could not be triggered (case 2)
+#   still_syncing: list of monitor_ids that were still syncing when the timeout was reached
+#   batch_ids: every batch that was triggered
+def trigger_monitors(monitor_ids):
+    triggered = []
+    rejected = {}
+    batch_ids = []
+    pending_monitor_ids = list(monitor_ids)
+    readiness_delay = READINESS_INITIAL_DELAY_SECONDS
+    readiness_deadline = time.monotonic() + monitor_sync_timeout_seconds
+
+    while len(pending_monitor_ids) > 0:
+        batch_response_json = trigger_batch(pending_monitor_ids)
+        batch_id = batch_response_json['batchId']
+        batch_ids.append(batch_id)
+        print(f"Successfully triggered batch: {batch_id} for {len(pending_monitor_ids)} monitor(s)")
+        triggered.extend(batch_response_json.get('triggered', []))
+
+        if batch_response_json.get('triggeringProblemsCount', 0) == 0:
+            return triggered, rejected, [], batch_ids
+
+        # Newer API versions return the problems with the trigger response
+        # Otherwise fetch them from the batch
+        triggering_problems = batch_response_json.get('triggeringProblemsDetails')
+        if triggering_problems is None:
+            get_batch_response_json = get_batch(batch_id)
+            batch_status = get_batch_response_json['batchStatus']
+            if batch_status == "FAILED" or batch_status == "FAILED_TO_EXECUTE":
+                raise BatchFailedError(f"Batch {batch_id} failed with status: {batch_status}.")
+            triggering_problems = get_batch_response_json['triggeringProblems']
+
+        pending_monitor_ids = []
+        for triggering_problem in triggering_problems:
+            cause = triggering_problem['cause']
+            if "configuration is being synchronized. Please try in a moment." in cause:
+                pending_monitor_ids.append(triggering_problem['entityId'])
+            else:
+                print(f"Triggering Problem Cause: {cause}")
+                rejected[triggering_problem['entityId']] = cause
+        # Problems can be reported per location, so a monitor can be listed more than once
+        pending_monitor_ids = list(dict.fromkeys(pending_monitor_ids))
+
+        if len(pending_monitor_ids) == 0:
+            break
+
+        if time.monotonic() + readiness_delay > readiness_deadline:
+            print(f"{len(pending_monitor_ids)} monitor(s) still syncing after {monitor_sync_timeout_seconds}s. Giving up on them.")
+            return triggered, rejected, pending_monitor_ids, batch_ids
+
+        print(f"{len(pending_monitor_ids)} new monitor(s) still syncing. Retriggering only those in {readiness_delay}s")
+        run_metrics.sleep(readiness_delay)
+        readiness_delay = min(READINESS_MAX_DELAY_SECONDS, readiness_delay * READINESS_BACKOFF_MULTIPLIER)
+
+    return triggered, rejected, [], batch_ids
+
+# Trigger one chunk of monitors. Runs on the trigger executor
+# Errors are returned instead of raised so one failing chunk does not affect the others
+def trigger_chunk(chunk_number, monitor_ids):
+    with run_metrics.span("batch_triggering"):
+        return trigger_chunk_monitors(chunk_number, monitor_ids)
+
+def trigger_chunk_monitors(chunk_number, monitor_ids):
+    chunk_result = {
+        "chunk_number": chunk_number,
+        "monitor_ids": monitor_ids,
+        "triggered": [],
+        "rejected": {},
+        "still_syncing": [],
+        "batch_ids": [],
+        "error": None
+    }
+    try:
+        chunk_result['triggered'], chunk_result['rejected'], chunk_result['still_syncing'], chunk_result['batch_ids'] = trigger_monitors(monitor_ids)
+    except BatchFailedError as e:
+        chunk_result['error'] = str(e)
+    except Exception as e:
+        chunk_result['error'] = f"Exception caught triggering batch execution: {e}"
+    return chunk_result
+
+def hash_file(filename):
+    file_hash = hashlib.sha256()
+    with open(filename, "rb") as file:
+        for chunk in iter(lambda: file.read(DISCOVERY_HASH_CHUNK_SIZE), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+# The discovery manifest records, for each file in the .dynatrace folder, its content hash and the URLs it produced
+# Parsed URLs depend on defaultRootUrl (and on how paths are joined to it), so a manifest written with a different defaultRootUrl or version is ignored
+def load_discovery_manifest():
+    try:
+        with open(discovery_manifest_path) as manifest_file:
+            discovery_manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(discovery_manifest, dict) or discovery_manifest.get('version') != DISCOVERY_MANIFEST_VERSION or discovery_manifest.get('defaultRootUrl') != default_root_url:
+        return {}
+    return discovery_manifest.get('files', {})
+
+def save_discovery_manifest(discovered_files):
+    os.makedirs(cache_directory, exist_ok=True)
+    temporary_path = f"{discovery_manifest_path}.tmp"
+    with open(temporary_path, "w") as manifest_file:
+        json.dump({ "version": DISCOVERY_MANIFEST_VERSION, "defaultRootUrl": default_root_url, "files": discovered_files }, manifest_file)
+    os.replace(temporary_path, discovery_manifest_path)
+
+# Start time (epoch millis) of an execution, or None if the report does not include one
+def get_execution_start_timestamp(execution):
+    for results_key in ['simpleResults', 'fullResults']:
+        start_timestamp = (execution.get(results_key) or {}).get('startTimestamp')
+        if start_timestamp is not None:
+            return start_timestamp
+    return None
+
+# Latest successful or failed execution of a monitor at a location, whichever is more recent
+# Returns None if the monitor has never run there
+def get_latest_execution_result(monitor_id, location_id):
+    latest_execution = None
+    for result_type in ['SUCCESS', 'FAILED']:
+        latest_execution_response = dynatrace_client.get(
+            f"/api/v2/synthetic/execution/{monitor_id}/{result_type}/fullReport",
+            call_name="get_latest_execution",
+            params={ "locationId": location_id }
+        )
+        if latest_execution_response.status_code != 200:
+            continue
+        execution = latest_execution_response.json()
+        start_timestamp = get_execution_start_timestamp(execution)
+        if start_timestamp is None:
+            continue
+        if latest_execution is None or start_timestamp > get_execution_start_timestamp(latest_execution):
+            latest_execution = execution
+    return latest_execution
+
+# A monitor's results are only reused if every configured location has a result younger than max_age_minutes
+# Otherwise the whole monitor is triggered again
+# The steps of each reused execution are added to step_batch. Returns the set of reused monitor IDs
+def find_fresh_execution_results(monitor_ids, max_age_minutes, step_batch):
+    fresh_after = (time.time() - max_age_minutes * 60) * 1000
+    reused_monitor_ids = set()
+
+    with ThreadPoolExecutor(max_workers=RESULT_COLLECTOR_MAX_WORKERS) as executor:
+        futures = {}
+        for monitor_id in monitor_ids:
+            futures[monitor_id] = [executor.submit(get_latest_execution_result, monitor_id, location_id) for location_id in default_locations]
+
+        for monitor_id in monitor_ids:
+            # Popped so each report can be freed once its steps are in the batch
+            location_futures = futures.pop(monitor_id)
+            try:
+                latest_executions = [future.result() for future in location_futures]
+            except Exception as e:
+                print(f"Exception caught looking up recent results for {monitor_id}: {e}. It will be triggered.")
+                continue
+
+            if all(execution is not None and get_execution_start_timestamp(execution) >= fresh_after for execution in latest_executions):
+                step_batch.add_execution_group(latest_executions, True)
+                reused_monitor_ids.add(monitor_id)
+
+    return reused_monitor_ids
+
+class ScoringRulesError(Exception):
+    pass
+
+# threshold and deduction must be numbers and enabled a boolean, wherever they are set
+def check_scoring_rule_values(description, rule):
+    for key in ["threshold", "deduction"]:
+        if key in rule and (isinstance(rule[key], bool) or not isinstance(rule[key], (int, float))):
+            raise ScoringRulesError(f"{description} needs a number for {key}, not {rule[key]!r}")
+    if "enabled" in rule and not isinstance(rule['enabled'], bool):
+        raise ScoringRulesError(f"{description} needs true or false for enabled, not {rule['enabled']!r}")
+
+# Validate the scoringRules block of .dynatrace/config.json
+# Returns a dictionary of rules (in order) and overrides (with their paths compiled into one pattern)
+def load_scoring_rules(scoring_rules_config):
+    rules = scoring_rules_config.get("rules", DEFAULT_SCORING_RULES)
+    rule_names = []
+    for rule in rules:
+        for key in ["name", "metric", "operator", "threshold", "deduction"]:
+            if key not in rule:
+                raise ScoringRulesError(f"Scoring rule {rule} is missing {key}")
+        if rule['metric'] not in SCORING_METRICS:
+            raise ScoringRulesError(f"Scoring rule {rule['name']} uses unknown metric {rule['metric']}. Use one of: {', '.join(SCORING_METRICS)}")
+        if rule['operator'] not in SCORING_OPERATORS:
+            raise ScoringRulesError(f"Scoring rule {rule['name']} uses unknown operator {rule['operator']}. Use one of: {' '.join(SCORING_OPERATORS)}")
+        check_scoring_rule_values(f"Scoring rule {rule['name']}", rule)
+        # The reason is only formatted once a rule matches, after the monitors have run. Try it now
+        try:
+            rule.get("reason", "").format(value="1", threshold="1")
+        except (KeyError, IndexError, ValueError) as e:
+            raise ScoringRulesError(f"Scoring rule {rule['name']} has an invalid reason {rule['reason']!r} ({type(e).__name__}: {e}). Only {{value}} and {{threshold}} can be used")
+        rule_names.append(rule['name'])
+
+    overrides = []
+    for override in scoring_rules_config.get("overrides", []):
+        if "paths" not in override or "rules" not in override:
+            raise ScoringRulesError(f"Scoring override {override} needs paths and rules")
+        for rule_name, rule_override in override['rules'].items():
+            if rule_name not in rule_names:
+                raise ScoringRulesError(f"Scoring override for {override['paths']} changes unknown rule {rule_name}")
+            check_scoring_rule_values(f"Scoring override of {rule_name} for {override['paths']}", rule_override)
+        overrides.append({
+            "pathPattern": re.compile("|".join(fnmatch.translate(path) for path in override['paths'])),
+            "rules": override['rules']
+        })
+
+    return {
+        "rules": rules,
+        "overrides": overrides
+    }
+
+# Missing (or null) numbers are stored as NaN, which never matches a rule
+def get_step_number(step, key):
+    value = step.get(key)
+    if value is None:
+        return math.nan
+    return value
+
+# Linear interpolation between the closest ranks, like numpy.percentile. sorted_values must not be empty
+def get_percentile(sorted_values, percent):
+    position = (len(sorted_values) - 1) * percent / 100
+    lower_index = math.floor(position)
+    upper_index = min(lower_index + 1, len(sorted_values) - 1)
+    return sorted_values[lower_index] + (sorted_values[upper_index] - sorted_values[lower_index]) * (position - lower_index)
+
+# p50, p95 or max of a location's values. Locations without the value are ignored
+def get_aggregate(sorted_values, aggregate):
+    if len(sorted_values) == 0:
+        return math.nan
+    if aggregate == "max":
+        return sorted_values[-1]
+    return get_percentile(sorted_values, 95 if aggregate == "p95" else 50)
+
+# Groups a stream of executions by monitor in a single pass
+# expected_location_counts maps a monitor ID to the number of executions triggered for it
+# A group is complete once that many have arrived. Monitors that are not in it complete with every execution
+class ExecutionGrouper:
+    def __init__(self, expected_location_counts):
+        self.expected_location_counts = expected_location_counts
+        self.pending_groups = {}
+
+    # Returns the monitor's executions once the group is complete, otherwise None
+    def add(self, execution):
+        monitor_id = execution.get("monitorId")
+        expected_location_count = self.expected_location_counts.get(monitor_id, 1)
+        if expected_location_count <= 1:
+            return [execution]
+        group = self.pending_groups.setdefault(monitor_id, [])
+        group.append(execution)
+        if len(group) < expected_location_count:
+            return None
+        return self.pending_groups.pop(monitor_id)
+
+    # Groups that never completed (eg. an execution that never returned its result)
+    def flush(self):
+        groups = list(self.pending_groups.values())
+        self.pending_groups = {}
+        return groups
+
+# The step fields scoring needs: (url, insecure, certificate expiry date, { metric: value })
+def read_step(step):
+    url = step["requestName"]
+    insecure = url.startswith("http://") or step.get("peerCertificateDetails", "") == ""
+    return url, insecure, get_step_number(step, "peerCertificateExpiryDate"), { metric: get_step_number(step, metric) for metric in SCORING_STEP_METRICS }
+
+# Execution steps, one column per metric, waiting to be scored together
+# Only the fields scoring needs are kept, in typed arrays (8 bytes per number) rather than the fullReport
+# Each row is one step of one monitor, aggregated across its locations
+# The rows of every single location are kept in location_rows so each location can be passed or failed as well
+# Locations whose execution never returned a result are kept in missing_locations as (location ID, reason). They fail
+class StepBatch:
+    __slots__ = ["urls", "reused", "insecure", "cert_expiry_dates", "step_metrics", "location_ids", "missing_locations", "ttfb_percentiles", "location_rows"]
+
+    def __init__(self, with_locations=True):
+        self.urls = []
+        self.reused = array.array("b")
+        self.insecure = array.array("b")
+        self.cert_expiry_dates = array.array("d")
+        self.step_metrics = { metric: array.array("d") for metric in SCORING_STEP_METRICS }
+        self.location_ids = []
+        self.missing_locations = []
+        self.ttfb_percentiles = []
+        self.location_rows = StepBatch(False) if with_locations else None
+
+    def __len__(self):
+        return len(self.urls)
+
+    def add_row(self, url, is_reused, insecure, cert_expiry_date, metric_values):
+        self.urls.append(url)
+        self.reused.append(is_reused)
+        self.insecure.append(insecure)
+        self.cert_expiry_dates.append(cert_expiry_date)
+        for metric, values in self.step_metrics.items():
+            values.append(metric_values[metric])
+
+    # The executions of one monitor, one per location
+    # Step n of every location is aggregated into one row
+    # Only monitors with more than one location add rows to location_rows. Otherwise the aggregated row is the location's row
+    # Executions with a missingReason (see collect_execution_results) are added to every row as missing locations
+    # If no location returned a result, the monitor gets a single row without metrics
+    def add_execution_group(self, executions, is_reused):
+        missing_locations = sorted((execution.get("locationId", ""), execution['missingReason']) for execution in executions if "missingReason" in execution)
+        if len(missing_locations) == len(executions):
+            self.add_row(executions[0]['url'], is_reused, False, math.nan, { metric: math.nan for metric in SCORING_STEP_METRICS })
+            self.location_ids.append([])
+            self.missing_locations.append(missing_locations)
+            self.ttfb_percentiles.append(None)
+            return
+        executions = [execution for execution in executions if "missingReason" not in execution]
+
+        if len(executions) == 1 and len(missing_locations) == 0:
+            location_ids = [executions[0].get("locationId", "")]
+            for step in executions[0]["fullResults"]["executionSteps"]:
+                url, insecure, cert_expiry_date, metric_values = read_step(step)
+                self.add_row(url, is_reused, insecure, cert_expiry_date, metric_values)
+                self.location_ids.append(location_ids)
+                self.missing_locations.append([])
+                ttfb = metric_values['timeToFirstByte']
+                self.ttfb_percentiles.append(None if math.isnan(ttfb) else (ttfb, ttfb, ttfb))
+            return
+
+        executions = sorted(executions, key=lambda execution: execution.get("locationId", ""))
+        step_lists = [execution["fullResults"]["executionSteps"] for execution in executions]
+        for step_index in range(max(len(steps) for steps in step_lists)):
+            location_ids = []
+            location_insecure = []
+            location_cert_expiry_dates = []
+            location_metric_values = { metric: [] for metric in SCORING_STEP_METRICS }
+            for execution, steps in zip(executions, step_lists):
+                if step_index >= len(steps):
+                    continue
+                url, insecure, cert_expiry_date, metric_values = read_step(steps[step_index])
+                self.location_rows.add_row(url, is_reused, insecure, cert_expiry_date, metric_values)
+                location_ids.append(execution.get("locationId", ""))
+                location_insecure.append(insecure)
+                if not math.isnan(cert_expiry_date):
+                    location_cert_expiry_dates.append(cert_expiry_date)
+                for metric, values in location_metric_values.items():
+                    values.append(metric_values[metric])
+
+            # Each metric's values are sorted once. The aggregate (and the TTFB percentiles) come from that
+            sorted_metric_values = { metric: sorted(value for value in values if not math.isnan(value)) for metric, values in location_metric_values.items() }
+            aggregated_metric_values = { metric: get_aggregate(values, "max" if metric in MAX_AGGREGATED_METRICS else scoring_aggregate) for metric, values in sorted_metric_values.items() }
+            sorted_ttfbs = sorted_metric_values['timeToFirstByte']
+            self.ttfb_percentiles.append(None if len(sorted_ttfbs) == 0 else (get_percentile(sorted_ttfbs, 50), get_percentile(sorted_ttfbs, 95), sorted_ttfbs[-1]))
+            self.location_ids.append(location_ids)
+            self.missing_locations.append(missing_locations)
+            self.add_row(url, is_reused, any(location_insecure), min(location_cert_expiry_dates, default=math.nan), aggregated_metric_values)
+
+    def columns(self):
+        import numpy as np
+
+        columns = { metric: np.array(values, dtype=float) for metric, values in self.step_metrics.items() }
+        columns['insecure'] = np.array(self.insecure, dtype=float)
+        # Whole days, like datetime.timedelta.days
+        now_milliseconds = time.time() * 1000
+        columns['certDaysRemaining'] = np.floor((np.array(self.cert_expiry_dates, dtype=float) - now_milliseconds) / MILLISECONDS_PER_DAY)
+        return columns
+
+# Boolean mask of the steps whose URL path matches the pattern
+def match_paths(paths, path_pattern):
+    import numpy as np
+
+    return np.fromiter((path_pattern.match(path) is not None for path in paths), dtype=bool, count=len(paths))
+
+# Score every step in the batch at once
+# Every step starts at 100 points. Each matching rule deducts its points. The lowest score is 0
+# Returns a list of result dictionaries (url, score, reasons, reused) in the order the steps were added
+def score_step_batch(step_batch, scoring_rules):
+    import numpy as np
+
+    step_count = len(step_batch)
+    columns = step_batch.columns()
+    override_masks = []
+    if len(scoring_rules['overrides']) > 0:
+        # A regex rather than urlsplit() as this runs for every step
+        paths = [URL_PATH_PATTERN.match(url).group(1) or "/" for url in step_batch.urls]
+        override_masks = [match_paths(paths, override['pathPattern']) for override in scoring_rules['overrides']]
+
+    total_deductions = np.zeros(step_count)
+    group_matches = {}
+    reasons = [[] for _ in range(step_count)]
+
+    for rule in scoring_rules['rules']:
+        thresholds = np.full(step_count, rule['threshold'], dtype=float)
+        deductions = np.full(step_count, rule['deduction'], dtype=float)
+        enabled = np.full(step_count, rule.get("enabled", True), dtype=bool)
+        # Later overrides win
+        for override, override_mask in zip(scoring_rules['overrides'], override_masks):
+            rule_override = override['rules'].get(rule['name'])
+            if rule_override is None:
+                continue
+            if "threshold" in rule_override:
+                thresholds[override_mask] = rule_override['threshold']
+            if "deduction" in rule_override:
+                deductions[override_mask] = rule_override['deduction']
+            if "enabled" in rule_override:
+                enabled[override_mask] = rule_override['enabled']
+
+        values = columns[rule['metric']]
+        matches = getattr(np, SCORING_OPERATORS[rule['operator']])(values, thresholds) & enabled
+        if "group" in rule:
+            if rule['group'] not in group_matches:
+                group_matches[rule['group']] = np.zeros(step_count, dtype=bool)
+            matches &= ~group_matches[rule['group']]
+            group_matches[rule['group']] |= matches
+        total_deductions += np.where(matches, deductions, 0)
+
+        reason = rule.get("reason", f"{rule['metric']} {rule['operator']} {{threshold}}")
+        matched_indexes = np.flatnonzero(matches)
+        for step_index, deduction, value, threshold in zip(matched_indexes.tolist(), deductions[matched_indexes].tolist(), values[matched_indexes].tolist(), thresholds[matched_indexes].tolist()):
+            reasons[step_index].append(f"Removing {deduction:g} points from {step_batch.urls[step_index]} because " + reason.format(value=f"{value:g}", threshold=f"{threshold:g}"))
+
+    scores = [int(score) if score.is_integer() else round(score, 1) for score in np.maximum(0, 100 - total_deductions).tolist()]
+    # A monitor without any result scores 0
+    if step_batch.location_rows is not None:
+        for step_index, (location_ids, missing_locations) in enumerate(zip(step_batch.location_ids, step_batch.missing_locations)):
+            if len(location_ids) == 0:
+                scores[step_index] = 0
+            reasons[step_index].extend(f"No result from {location_id}. {reason}" for location_id, reason in missing_locations)
+
+    step_results = [{
+        "url": url,
+        "score": score,
+        "reasons": step_reasons,
+        "reused": bool(is_reused)
+    } for url, score, step_reasons, is_reused in zip(step_batch.urls, scores, reasons, step_batch.reused)]
+    if step_batch.location_rows is None:
+        return step_results
+
+    # The (aggregated) step metrics the result was scored on. Missing values are null
+    for step_index, step_result in enumerate(step_results):
+        step_result['metrics'] = {}
+        for metric, values in step_batch.step_metrics.items():
+            value = values[step_index]
+            step_result['metrics'][metric] = None if math.isnan(value) else (int(value) if value.is_integer() else round(value, 1))
+
+    # Each location of a multi-location monitor is scored on its own values as well
+    # With a single location its score is the aggregated one
+    location_scores = []
+    if len(step_batch.location_rows) > 0:
+        location_scores = [location_result['score'] for location_result in score_step_batch(step_batch.location_rows, scoring_rules)]
+    location_index = 0
+    for step_result, location_ids, missing_locations, ttfb_percentiles in zip(step_results, step_batch.location_ids, step_batch.missing_locations, step_batch.ttfb_percentiles):
+        if len(location_ids) == 1 and len(missing_locations) == 0:
+            step_result['locations'] = [{ "locationId": location_ids[0], "score": step_result['score'], "status": get_result_status(step_result['score']) }]
+        else:
+            step_result['locations'] = []
+            for location_id in location_ids:
+                location_score = location_scores[location_index]
+                step_result['locations'].append({ "locationId": location_id, "score": location_score, "status": get_result_status(location_score) })
+                location_index += 1
+            step_result['locations'].extend({ "locationId": location_id, "score": 0, "status": "failed" } for location_id, _ in missing_locations)
+        if ttfb_percentiles is not None:
+            step_result['timeToFirstByte'] = { "p50": round(ttfb_percentiles[0], 1), "p95": round(ttfb_percentiles[1], 1), "max": ttfb_percentiles[2] }
+    return step_results
+
+# "passed", "warning" or "failed"
+def get_result_status(score):
+    if score < FAIL_THRESHOLD:
+        return "failed"
+    if score < WARNING_THRESHOLD:
+        return "warning"
+    return "passed"
+
+# "2/3 passed (GEOLOCATION-2 failed)". Empty for results without locations (eg. a monitor that could not be created)
+def format_location_statuses(result):
+    locations = result.get('locations', [])
+    if len(locations) == 0:
+        return ""
+    passed_count = sum(1 for location in locations if location['status'] == "passed")
+    location_statuses = f"{passed_count}/{len(locations)} passed"
+    not_passed = [f"{location['locationId']} {location['status']}" for location in locations if location['status'] != "passed"]
+    # Only worth naming the locations when some of them passed
+    if len(not_passed) > 0 and passed_count > 0:
+        location_statuses += f" ({', '.join(not_passed)})"
+    return location_statuses
+
+# "120 / 480 / 510ms" (p50 / p95 / max)
+def format_ttfb_percentiles(result):
+    ttfb_percentiles = result.get('timeToFirstByte')
+    if ttfb_percentiles is None:
+        return ""
+    return f"{ttfb_percentiles['p50']:g} / {ttfb_percentiles['p95']:g} / {ttfb_percentiles['max']:g}ms"
+
+# "TTFB 912ms (baseline 415ms, z 6.2)" for each regression from the baseline
+def format_regressions(result):
+    formatted_regressions = []
+    for regression in result.get('regressions', []):
+        label, unit = REGRESSION_METRIC_LABELS[regression['metric']]
+        formatted_regressions.append(f"{label} {regression['value']:g}{unit} (baseline {regression['baseline']:g}{unit}, z {regression['zScore']:g})")
+    return ", ".join(formatted_regressions)
+
+# The PR comment (and step summary) table. Rows are written as results are scored
+# Only warnings, failures and regressions get a row, up to max_rows rows and TABLE_MAX_CHARACTERS
+# Every result is counted
+class ResultTable:
+    def __init__(self, max_rows):
+        self.max_rows = max_rows
+        self.rows = io.StringIO()
+        self.row_count = 0
+        self.omitted_count = 0
+        self.status_counts = { "passed": 0, "warning": 0, "failed": 0 }
+        self.reused_count = 0
+        self.regression_count = 0
+
+    def write(self, result):
+        result_status = get_result_status(result['score'])
+        self.status_counts[result_status] += 1
+        if result.get('reused', False):
+            self.reused_count += 1
+        if len(result.get('regressions', [])) > 0:
+            self.regression_count += 1
+        elif result_status == "passed":
+            return
+
+        status = RESULT_STATUS_EMOJIS[result_status]
+        # Mark results that came from a recent execution rather than one triggered by this run
+        if result.get('reused', False):
+            status += " :recycle:"
+        if len(result.get('regressions', [])) > 0:
+            status += f" {REGRESSION_EMOJI}"
+        row = f"<tr><td>{status}</td><td>{result['url']}</td><td>{result['score']}%</td><td>{format_location_statuses(result)}</td><td>{format_ttfb_percentiles(result)}</td><td>{format_regressions(result)}</td><td>{result['reasons']}</td></tr>"
+        if self.row_count >= self.max_rows or self.rows.tell() + len(row) > TABLE_MAX_CHARACTERS:
+            self.omitted_count += 1
+            return
+        self.rows.write(row)
+        self.row_count += 1
+
+    def result_count(self):
+        return sum(self.status_counts.values())
+
+    def close(self):
+        pass
+
+    def content(self):
+        content = f"{RESULT_STATUS_EMOJIS['passed']} {self.status_counts['passed']} passed, {RESULT_STATUS_EMOJIS['warning']} {self.status_counts['warning']} warning(s), {RESULT_STATUS_EMOJIS['failed']} {self.status_counts['failed']} failed"
+        if self.reused_count > 0:
+            content += f" (:recycle: {self.reused_count} reused)"
+        if self.regression_count > 0:
+            content += f", {REGRESSION_EMOJI} {self.regression_count} regressed from the baseline"
+        content += "\n\n"
+        if self.row_count > 0:
+            content += "<table><tr><th>Status</th><th>URL</th><th>Score</th><th>Locations</th><th>TTFB (p50 / p95 / max)</th><th>Regressions</th><th>Score Reduction Reasons</th>" + self.rows.getvalue() + "</table>\n"
+        if self.omitted_count > 0:
+            content += f"\n{self.omitted_count} more warning(s), failure(s) and regression(s) are not shown. See the {RESULTS_JSONL_FILE_NAME} and {RESULTS_JUNIT_FILE_NAME} artifacts for every result.\n"
+        return content
+
+# Every result as one JSON document per line
+class ResultJsonLinesFile:
+    def __init__(self, path):
+        self.file = open(path, "w")
+
+    def write(self, result):
+        self.file.write(json.dumps(dict(result, status=get_result_status(result['score']), reused=result.get('reused', False))) + "\n")
+
+    def close(self):
+        self.file.close()
+
+# Every result as a JUnit test case. Warnings pass, with their reasons in system-out
+# The testsuite element needs the totals, so test cases are streamed to a temporary file first
+class ResultJUnitFile:
+    def __init__(self, path):
+        self.path = path
+        self.testcases_file = open(f"{path}.testcases", "w+")
+        self.test_count = 0
+        self.failure_count = 0
+
+    def write(self, result):
+        result_status = get_result_status(result['score'])
+        details = list(result['reasons'])
+        if len(result.get('locations', [])) > 1:
+            details.append(f"Locations: {format_location_statuses(result)}")
+        if len(result.get('regressions', [])) > 0:
+            details.append(f"Regressed from the baseline: {format_regressions(result)}")
+        reasons = escape("\n".join(details))
+        self.testcases_file.write(f"  <testcase classname={quoteattr(JUNIT_SUITE_NAME)} name={quoteattr(result['url'])}>\n")
+        if result_status == "failed":
+            failure_message = f"Score {result['score']}% is below {FAIL_THRESHOLD}%"
+            self.testcases_file.write(f"    <failure message={quoteattr(failure_message)}>{reasons}</failure>\n")
+        elif len(details) > 0:
+            self.testcases_file.write(f"    <system-out>{reasons}</system-out>\n")
+        self.testcases_file.write("  </testcase>\n")
+        self.test_count += 1
+        if result_status == "failed":
+            self.failure_count += 1
+
+    def close(self):
+        with open(self.path, "w") as junit_file:
+            junit_file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+            junit_file.write(f"<testsuite name={quoteattr(JUNIT_SUITE_NAME)} tests=\"{self.test_count}\" failures=\"{self.failure_count}\" errors=\"0\" skipped=\"0\">\n")
+            self.testcases_file.seek(0)
+            for line in self.testcases_file:
+                junit_file.write(line)
+            junit_file.write("</testsuite>\n")
+        self.testcases_file.close()
+        os.remove(f"{self.path}.testcases")
+
+# Baselines are only updated by runs on baselineBranch (not by pull requests, whose GITHUB_HEAD_REF is set)
+# DT_EVALUATOR_BASELINE=true or false overrides this, eg. for serve mode or local runs
+def is_baseline_run():
+    baseline_override = os.getenv("DT_EVALUATOR_BASELINE", "").strip().lower()
+    if baseline_override != "":
+        return baseline_override == "true"
+    return os.getenv("GITHUB_HEAD_REF", "") == "" and os.getenv("GITHUB_REF_NAME", "") == baseline_branch
+
+# The sinks every result is written to. The table is returned separately as it becomes the PR comment
+# With with_history, results are recorded in (and compared with) the history first
+def open_result_sinks(with_history=False):
+    os.makedirs(output_directory, exist_ok=True)
+    result_table = ResultTable(max_table_rows)
+    result_sinks = [
+        result_table,
+        ResultJsonLinesFile(f"{output_directory}/{RESULTS_JSONL_FILE_NAME}"),
+        ResultJUnitFile(f"{output_directory}/{RESULTS_JUNIT_FILE_NAME}")
+    ]
+    if with_history and record_history:
+        # sqlite3 is only needed when history is recorded
+        from dynatrace_endpoint_evaluator import history
+
+        is_baseline = is_baseline_run()
+        print(f"Recording results in {history_path}. {'This is a baseline run. Baselines will be updated' if is_baseline else f'Comparing with the {baseline_branch} baseline'}.")
+        result_sinks.insert(0, history.ResultHistory(history_path, engine, is_baseline, regression_ewma_alpha, regression_z_threshold, regression_min_samples))
+    return result_table, result_sinks
+
+def close_result_sinks(result_table, result_sinks):
+    for sink in result_sinks:
+        sink.close()
+    print(f"Wrote {result_table.result_count()} result(s) to {output_directory}/{RESULTS_JSONL_FILE_NAME} and {output_directory}/{RESULTS_JUNIT_FILE_NAME}")
+    if not isinstance(result_sinks[0], ResultTable):
+        print(f"{result_sinks[0].compared_count} result(s) compared with a baseline. {result_sinks[0].regression_count} regressed.")
+
+    # Nicely formatted output table for PR comment
+    publish_table_content(result_table.content())
+
+def write_result(result_sinks, result):
+    for sink in result_sinks:
+        sink.write(result)
+
+def score_and_write_results(step_batch, result_sinks):
+    with run_metrics.span("scoring"):
+        step_results = score_step_batch(step_batch, scoring_rules)
+    for step_result in step_results:
+        for reason in step_result['reasons']:
+            print(reason)
+        print(f"Endpoint: {step_result['url']} Points: {step_result['score']}")
+        write_result(result_sinks, step_result)
+
+# Executions (from either engine) are grouped by monitor and scored in micro-batches as the groups complete
+# expected_location_counts is the number of executions to wait for per monitor ID (see ExecutionGrouper)
+# Returns the number of executions scored
+def score_executions(executions, result_sinks, expected_location_counts):
+    execution_count = 0
+    execution_grouper = ExecutionGrouper(expected_location_counts)
+    step_batch = StepBatch()
+    for execution in executions:
+        if "missingReason" not in execution:
+            execution_count += 1
+        execution_group = execution_grouper.add(execution)
+        if execution_group is None:
+            continue
+        step_batch.add_execution_group(execution_group, False)
+        if len(step_batch) >= SCORING_BATCH_SIZE:
+            score_and_write_results(step_batch, result_sinks)
+            step_batch = StepBatch()
+    for execution_group in execution_grouper.flush():
+        step_batch.add_execution_group(execution_group, False)
+    if len(step_batch) > 0:
+        score_and_write_results(step_batch, result_sinks)
+    return execution_count
+
+# Evaluates the URLs with the local engine. No monitors are created and Dynatrace is not called
+# urls is a dictionary of canonical URL to the URL to request
+def evaluate_locally(urls):
+    # asyncio and ssl are only needed by the local engine
+    from dynatrace_endpoint_evaluator import local_probe
+
+    run_metrics.start_phase("local_probing")
+    print(f"Probing {len(urls)} URL(s) from this runner (at most {local_probe_concurrency} at once, {local_probe_per_host_concurrency} per host)")
+
+    result_table, result_sinks = open_result_sinks(with_history=True)
+    probe_failures = []
+    local_probe_executions = local_probe.iter_local_probe_executions(urls, probe_failures, local_probe_concurrency, local_probe_per_host_concurrency, local_probe_timeout_seconds)
+    execution_results_count = score_executions(local_probe_executions, result_sinks, {})
+
+    print("=================================================================================")
+    print(f"All done. Probed {execution_results_count} of {len(urls)} URL(s).")
+
+    for probe_failure in probe_failures:
+        write_result(result_sinks, {
+            "url": probe_failure['endpoint'],
+            "score": 0,
+            "reasons": [probe_failure['reason']]
+        })
+
+    run_metrics.start_phase("output")
+    run_metrics.set_counter("results", result_table.result_count())
+    run_metrics.set_counter("probe_failures", len(probe_failures))
+
+    close_result_sinks(result_table, result_sinks)
+
+    return {
+        "exitCode": 0,
+        "statusCounts": result_table.status_counts,
+        "reusedCount": result_table.reused_count,
+        "regressionCount": result_table.regression_count,
+        "failedBatchIds": [],
+        "tableContent": result_table.content()
+    }
+
+# Set the output so other GitHub Actions can use it (eg. to comment on the PR)
+# This is important
+def publish_table_content(table_content):
+    github_output_path = os.getenv("GITHUB_OUTPUT", "")
+    if github_output_path != "":
+        write_github_file_command(github_output_path, "table_content", table_content)
+    else:
+        print(table_content)
+
+    github_step_summary_path = os.getenv("GITHUB_STEP_SUMMARY", "")
+    if github_step_summary_path != "":
+        with open(github_step_summary_path, "a") as step_summary_file:
+            step_summary_file.write(f"## Endpoint Results\n\n{table_content}\n")
+
+# Stable across runs and runners (unlike hash()), so a URL always lands in the same shard
+def get_shard_index(url, shard_count):
+    return int(hashlib.sha256(canonicalize_url(url).encode("utf-8")).hexdigest()[:16], 16) % shard_count
+
+# Every result from the results.jsonl files found anywhere below directory (eg. one folder per downloaded artifact)
+def iter_shard_results(directory):
+    for root, dir_names, file_names in os.walk(directory):
+        # Walk in a stable order
+        dir_names.sort()
+        if RESULTS_JSONL_FILE_NAME not in file_names:
+            continue
+        print(f"Merging {os.path.join(root, RESULTS_JSONL_FILE_NAME)}")
+        with open(os.path.join(root, RESULTS_JSONL_FILE_NAME)) as results_file:
+            for line in results_file:
+                if line.strip() != "":
+                    yield json.loads(line)
+
+# Multiline values are written with a random heredoc delimiter
+# https://docs.github.com/en/actions/using-workflows/workflow-commands-for-github-actions#multiline-strings
+def write_github_file_command(path, name, value):
+    delimiter = f"ghadelimiter_{uuid.uuid4()}"
+    with open(path, "a") as github_file:
+        github_file.write(f"{name}<<{delimiter}\n{value}\n{delimiter}\n")
+
+# Returns a tuple of (url_return_list, sitemap_return_list)
+# sitemap_return_list holds remote sitemaps referenced by a sitemap index in the repo. They are unpacked later
+def parse(filename):
+
+    root_url = default_root_url # Could be overriden by servers block
+    url_return_list = []
+    sitemap_return_list = []
+
+    # Google supported .txt file sitemap format
+    # One URL per line
+    # https://developers.google.com/search/docs/crawling-indexing/sitemaps/build-sitemap#text
+    if filename.endswith(".txt"):
+        with open(filename) as file:
+            data = file.read()
+            url_list = data.splitlines()
+            for url in url_list:
+                # Add to master list...
+                url_return_list.append(ensure_full_url(url))
+    # sitemap.xml parsing
+    # This logic is used if a sitemap.xml file is physically placed in the repo
+    # https://developers.google.com/search/docs/crawling-indexing/sitemaps/build-sitemap#xml
+    elif filename.endswith(".xml") or filename.endswith(".xml.gz"):
+        with open(filename, "rb") as xml_file:
+            page_urls, child_sitemap_urls = read_sitemap(xml_file)
+        # Add to master list
+        url_return_list.extend(page_urls)
+        # A sitemap index in the repo points at remote sitemaps
+        sitemap_return_list.extend(child_sitemap_urls)
+    # Could be OpenAPI or Dynatrace endpoints.json format
+    elif filename.endswith(".json"):
+        with open(filename) as json_file:
+            json_file = json.load(json_file)
+        
+            # Currently supported:
+            # OpenAPI format or
+            # Dynatrace Endpoints format
+
+            # PARSE OPENAPI FORMAT
+            if "openapi" in json_file:
+                #print(f"Parsing JSON file and {filename} is an OpenAPI file")
+
+                # If a servers block is given, can be multiple URLs so loop through each
+                # TODO
+                #if "servers" in json_file:
+                    # TODO
+
+                paths_available = json_file['paths'].keys()
+            
+                for path in paths_available:
+                    # Add to master list
+                    url_return_list.append(ensure_full_url(path))
+
+                    path_full_info = json_file['paths'][path]
+                    path_supported_http_method = path_full_info.keys()
+        
+            # PARSE DYNATRACE ENDPOINTS FORMAT
+            # Note openapi has 'paths' too hence check that first and else if
+            elif "paths" in json_file:
+                #print(f"Parsing JSON file and {filename} is a Dynatrace Endpoints file")
+                # Regardless of whether or not rootUrl is set,
+                # add path (or full URL if it is all set in the path) to the url
+                # Then add to master list
+                for path in json_file['paths']:
+                    #url += path['path']
+                    url_return_list.append(ensure_full_url(path['path']))
+
+            else:
+                print(f"Parsing JSON file but {filename} is currently an unsupported format")
+    
+    return url_return_list, sitemap_return_list
+
+
+####################
+# Start main logic #
+####################
+
+run_metrics = RunMetrics()
+
+default_root_url = ""
+config_file_name = "config.json"
+directory_to_scan = ".dynatrace"
+cache_directory = f"{directory_to_scan}/.cache"
+monitor_id_cache_path = f"{cache_directory}/{MONITOR_ID_CACHE_FILE_NAME}"
+sitemap_cache_directory = f"{cache_directory}/sitemaps"
+discovery_manifest_path = f"{cache_directory}/{DISCOVERY_MANIFEST_FILE_NAME}"
+history_path = f"{cache_directory}/{HISTORY_FILE_NAME}"
+# Created by main(). dynatrace_client stays None for the local engine
+dynatrace_client = None
+sitemap_session = None
+
+# One evaluation of every URL: discovery, monitor lookup and creation, triggering, scoring and output
+# Returns a summary of the evaluation. Fatal problems exit (SystemExit) as they always have
+def evaluate():
+    run_metrics.start_phase("discovery")
+
+    # Accumulate URLs from every file in the .dynatrace folder
+    # Files whose content hash matches the manifest from the previous run are not parsed again
+    file_list = sorted(os.scandir(directory_to_scan), key=lambda file_or_dir: file_or_dir.name)
+    url_string_list = []
+    sitemap_url_list = []
+
+    discovery_manifest = load_discovery_manifest()
+    discovered_files = {}
+    reparsed_files_count = 0
+
+    for file_or_dir in file_list:
+        if os.path.isfile(file_or_dir.path) and config_file_name not in file_or_dir.path:
+            file_hash = hash_file(file_or_dir.path)
+            discovered_file = discovery_manifest.get(file_or_dir.path)
+            if discovered_file is None or discovered_file['sha256'] != file_hash:
+                file_urls, file_sitemap_urls = parse(file_or_dir.path)
+                discovered_file = {
+                    "sha256": file_hash,
+                    "urls": file_urls,
+                    "sitemapUrls": file_sitemap_urls
+                }
+                reparsed_files_count += 1
+            discovered_files[file_or_dir.path] = discovered_file
+            url_string_list.extend(discovered_file['urls'])
+            sitemap_url_list.extend(discovered_file['sitemapUrls'])
+
+    print(f"Discovered URLs from {len(discovered_files)} file(s). {reparsed_files_count} changed file(s) were parsed.")
+    save_discovery_manifest(discovered_files)
+
+    # It is possible that a user has listed a sitemap.xml in the url_string_list
+    # This should be "unpacked" to test not only the existence of the sitemap.xml itself but also all URLs
+    # given in the sitemap.xml
+    # Every listed sitemap is fetched concurrently and all of their URLs are kept
+    sitemap_url_list.extend([url for url in url_string_list if is_sitemap_url(url)])
+    sitemap_urls_to_append = unpack_sitemaps(sitemap_url_list)
+
+    # Add any URLS from the unpacked sitemap.xml to the main list
+    url_string_list.extend(sitemap_urls_to_append)
+
+    # Index every listed spelling by its canonical URL. Each canonical URL is evaluated once
+    # The canonical URL identifies it (monitor name, cache key, shard). The first listed spelling is the URL requested
+    url_index = build_url_index(url_string_list)
+    url_string_list = list(url_index)
+    merged_spellings_count = sum(len(spellings) - 1 for spellings in url_index.values())
+    run_metrics.set_counter("merged_url_spellings", merged_spellings_count)
+    if merged_spellings_count > 0:
+        print(f"{merged_spellings_count} URL spelling(s) merged into their canonical URL:")
+        for canonical_url, spellings in url_index.items():
+            if len(spellings) > 1:
+                print(f"  {canonical_url} <- {', '.join(spellings)}")
+
+    # When sharded, only this shard's URLs are evaluated
+    if shard_count > 1:
+        unsharded_url_count = len(url_string_list)
+        url_string_list = [url for url in url_string_list if get_shard_index(url, shard_count) == shard_index]
+        print(f"Shard {shard_index} of {shard_count}: evaluating {len(url_string_list)} of {unsharded_url_count} URL(s)")
+
+    print(f"Will check these URLs: {url_string_list}")
+
+    # The local engine probes the same URL list and scores it with the same rules
+    if engine == "local":
+        return evaluate_locally({ url: url_index[url][0] for url in url_string_list })
+
+    # Test URLs
+    # Just because the URLs are in the "to test" list, doesn't mean
+    # we need to create a synthetic on the tenant. It may already exist
+    # body_hash is what the monitor should have. existing_hash is what it has (None if unknown)
+    working_list = []
+    for url in url_string_list:
+        working_list.append({
+            "endpoint": url,
+            "request_url": url_index[url][0],
+            "monitor_id": "",
+            "body_hash": build_desired_monitor_body(url, url_index[url][0])[1],
+            "existing_hash": None,
+            "existing_owner": None,
+            "executions": []
+        })
+
+    run_metrics.start_phase("entity_lookup")
+    run_metrics.set_counter("endpoints", len(working_list))
+
+    # Step 0: Use monitor IDs from previous runs
+    # An entry is trusted until it is older than the TTL, then it must be revalidated against the tenant
+    monitor_id_cache = load_monitor_id_cache()
+    cache_validated_after = time.time() - monitor_cache_ttl_hours * 3600
+    cached_monitors_count = 0
+
+    # Entries cached before monitors carried a hash are revalidated
+    for item in working_list:
+        cached_monitor = monitor_id_cache.get(canonicalize_url(item['endpoint']))
+        # A monitor cached for another owner (monitorOwner changed) is rediscovered
+        if cached_monitor is not None and cached_monitor['validatedAt'] >= cache_validated_after and cached_monitor.get('bodyHash') is not None and cached_monitor.get('owner') in (monitor_owner, None):
+            item['monitor_id'] = cached_monitor['monitorId']
+            item['existing_hash'] = cached_monitor['bodyHash']
+            item['existing_owner'] = cached_monitor.get('owner')
+            cached_monitors_count += 1
+
+    print(f"{cached_monitors_count} of {len(working_list)} monitor ID(s) found in cache")
+
+    # Step 1: Get existing HTTP_CHECK tagged with `git-action`
+    # Only needed if at least one URL is not in the cache (or its entry has expired)
+    # A dry run always looks, so its plan is complete
+    # Monitors owned by this repository that match no URL (in this shard) are stale
+    stale_monitors = []
+    if cached_monitors_count < len(working_list) or dry_run:
+        # Remove items from working_list that already exist
+        # Index the working list by URL so each existing monitor is matched in constant time
+        # Discovery is authoritative so cached IDs are cleared and rediscovered too
+        working_index = {}
+        for item in working_list:
+            item['monitor_id'] = ""
+            item['existing_hash'] = None
+            item['existing_owner'] = None
+            working_index[item['endpoint']] = item
+        existing_synthetics_count = 0
+        matched_synthetics_count = 0
+        other_owner_count = 0
+
+        try:
+            for existing_synthetic_http_check in iter_existing_synthetics():
+                existing_synthetics_count += 1
+                monitor_id = existing_synthetic_http_check['entityId']
+                existing_name = existing_synthetic_http_check['displayName']
+                existing_owner = get_entity_tag_value(existing_synthetic_http_check, MONITOR_OWNER_TAG_KEY)
+                if existing_owner is not None and existing_owner != monitor_owner:
+                    # Another repository's monitor. Never matched, updated or deleted
+                    other_owner_count += 1
+                    continue
+
+                # Monitors named after another spelling of a URL match too. They are renamed by the update
+                found_item = working_index.get(canonicalize_url(existing_name))
+                if found_item is not None and found_item['monitor_id'] == "":
+                    # Do not need to recreate but do make a record of the monitor_id
+                    matched_synthetics_count += 1
+                    found_item['monitor_id'] = monitor_id
+                    found_item['existing_hash'] = get_entity_body_hash(existing_synthetic_http_check)
+                    found_item['existing_owner'] = existing_owner
+                elif existing_owner == monitor_owner and (shard_count == 1 or get_shard_index(existing_name, shard_count) == shard_index):
+                    # A monitor for a URL that is no longer listed, or a duplicate of one that is
+                    stale_monitors.append({ "monitorId": monitor_id, "url": existing_name })
+        except ExistingSyntheticsError as e:
+            print(f"{e} Check your dt_environment_url and dt_api_token permissions. Cannot proceed. Exiting")
+            exit(1)
+        except:
+            print("Exception caught retrieving existing synthetics. Please check your DT_ENVIRONMENT_URL value. Cannot proceeed. Exiting.")
+            exit(1)
+
+        print(f"Found {existing_synthetics_count} existing tagged monitor(s). {other_owner_count} belong to other repositories. {matched_synthetics_count} match a URL to check. {len(stale_monitors)} stale.")
+
+        # Discovery is authoritative. Refresh the cache with everything it found
+        for item in working_list:
+            if item['monitor_id'] != "":
+                monitor_id_cache[canonicalize_url(item['endpoint'])] = {
+                    "monitorId": item['monitor_id'],
+                    "bodyHash": item['existing_hash'],
+                    "owner": item['existing_owner'],
+                    "validatedAt": time.time()
+                }
+    else:
+        print("Every monitor ID was found in the cache. Skipping entity discovery.")
+        # Without discovery, only monitors owned by this repository and cached for URLs that are no longer listed are known to be stale
+        listed_cache_keys = set(canonicalize_url(item['endpoint']) for item in working_list)
+        for cache_key, cached_monitor in monitor_id_cache.items():
+            if cached_monitor.get('owner') != monitor_owner:
+                continue
+            if cache_key not in listed_cache_keys and (shard_count == 1 or get_shard_index(cache_key, shard_count) == shard_index):
+                stale_monitors.append({ "monitorId": cached_monitor['monitorId'], "url": cache_key })
+
+    # working_list is now a list of items like:
+    # (where a test already exists in DT)
+    # {'endpoint': 'https://example.com/', 'monitor_id': 'HTTP_CHECK-AFA87AABE34655D4', 'executions': []}
+    # OR where a test does not exist and script needs to create one:
+    # {'endpoint': 'https://example.com/', 'monitor_id': '', executions: []}
+    #
+    # Note: Executions will always be empty at this point. They will be populated later
+
+    run_metrics.start_phase("monitor_creation")
+
+    # Reconcile the tenant with the URL list
+    # create: no monitor yet. update: the monitor's hash differs from the desired body's
+    # delete: stale monitors, only if deleteStaleMonitors is set and this is not a pull request
+    # Every branch of the repository shares its owner tag, so a pull request with fewer URLs would delete monitors other branches still use
+    to_be_created_items = [item for item in working_list if item['monitor_id'] == ""]
+    to_be_updated_items = [item for item in working_list if item['monitor_id'] != "" and item['existing_hash'] != item['body_hash']]
+    is_pull_request = os.getenv("GITHUB_HEAD_REF", "") != ""
+    monitors_to_delete = stale_monitors if delete_stale_monitors and not is_pull_request else []
+
+    plan = [{ "action": "create", "url": item['endpoint'], "requestUrl": item['request_url'], "monitorId": None } for item in to_be_created_items]
+    plan.extend({ "action": "update", "url": item['endpoint'], "requestUrl": item['request_url'], "monitorId": item['monitor_id'] } for item in to_be_updated_items)
+    plan.extend({ "action": "delete", "url": stale_monitor['url'], "monitorId": stale_monitor['monitorId'] } for stale_monitor in monitors_to_delete)
+    unchanged_count = len(working_list) - len(to_be_created_items) - len(to_be_updated_items)
+
+    plan_summary = f"Plan: {len(to_be_created_items)} to create, {len(to_be_updated_items)} to update, {len(monitors_to_delete)} to delete, {unchanged_count} unchanged."
+    if len(stale_monitors) > 0 and not delete_stale_monitors:
+        plan_summary += f" {len(stale_monitors)} stale monitor(s) are kept. Set deleteStaleMonitors to delete them."
+    elif len(stale_monitors) > 0 and is_pull_request:
+        plan_summary += f" {len(stale_monitors)} stale monitor(s) are kept. Stale monitors are only deleted outside pull requests."
+    print(plan_summary)
+
+    os.makedirs(output_directory, exist_ok=True)
+    with open(f"{output_directory}/{PLAN_FILE_NAME}", "w") as plan_file:
+        json.dump({ "summary": plan_summary, "dryRun": dry_run, "changes": plan }, plan_file, indent=2)
+
+    # A dry run stops here, before anything is changed or triggered
+    if dry_run:
+        for change in plan:
+            print(f"  {change['action']}: {change['url']} {change['monitorId'] or ''}")
+        plan_content = f"**Dry run.** {plan_summary} See {PLAN_FILE_NAME} for every change."
+        publish_table_content(plan_content)
+        return {
+            "exitCode": 0,
+            "dryRun": True,
+            "plan": plan,
+            "tableContent": plan_content
+        }
+
+    # Every change is applied concurrently
+    # A failure only affects its own URL. It is reported and the rest of the run carries on
+    provisioning_failures = []
+    if len(plan) > 0:
+        print(f"Applying {len(plan)} change(s) with concurrency {monitor_creation_concurrency} and at most {monitor_creation_rate_per_second} request(s) per second")
+        monitor_creation_bucket = TokenBucket(rate_per_second=monitor_creation_rate_per_second, capacity=monitor_creation_concurrency)
+        working_index = { item['endpoint']: item for item in working_list }
+
+        with ThreadPoolExecutor(max_workers=monitor_creation_concurrency) as executor:
+            futures = { executor.submit(apply_monitor_change, change, monitor_creation_bucket): change for change in plan }
+            for future in as_completed(futures):
+                change = futures[future]
+                monitor_id, error = future.result()
+
+                if change['action'] == "delete":
+                    if error is not None:
+                        print(f"Deletion of stale synthetic {change['monitorId']} ({change['url']}) failed. {error}")
+                        continue
+                    print(f"Deleted stale synthetic: {change['monitorId']} for {change['url']}")
+                    cached_monitor = monitor_id_cache.get(canonicalize_url(change['url']))
+                    if cached_monitor is not None and cached_monitor['monitorId'] == change['monitorId']:
+                        monitor_id_cache.pop(canonicalize_url(change['url']))
+                    continue
+
+                changed_item = working_index[change['url']]
+                if change['action'] == "update":
+                    # The monitor still exists with its old settings, so it is still triggered
+                    if error is not None:
+                        print(f"Update of synthetic {monitor_id} failed for {change['url']}. It will run with its old settings. {error}")
+                        continue
+                    print(f"Successfully updated: {monitor_id} for {change['url']}")
+                elif error is not None:
+                    print(f"Creation of synthetic failed for {change['url']}. {error}")
+                    provisioning_failures.append({
+                        "endpoint": change['url'],
+                        "reason": f"Could not create synthetic monitor. {error}"
+                    })
+                    continue
+                else:
+                    print(f"Successfully created: {monitor_id} for {change['url']}")
+                    # Set the monitor_id for this newly created entityId
+                    changed_item['monitor_id'] = monitor_id
+
+                changed_item['existing_hash'] = changed_item['body_hash']
+                monitor_id_cache[canonicalize_url(change['url'])] = {
+                    "monitorId": monitor_id,
+                    "bodyHash": changed_item['body_hash'],
+                    "owner": monitor_owner,
+                    "validatedAt": time.time()
+                }
+
+    save_monitor_id_cache(monitor_id_cache)
+
+    if len(provisioning_failures) > 0:
+        print(f"{len(provisioning_failures)} of {len(to_be_created_items)} synthetic(s) could not be created. These URLs will be reported as failed and are not triggered.")
+        working_list = [item for item in working_list if item['monitor_id'] != ""]
+
+    if len(working_list) == 0:
+        print("No monitors available to trigger. Cannot proceed. Exiting.")
+        exit(1)
+
+    run_metrics.start_phase("result_reuse")
+
+    # Optionally reuse recent results instead of triggering monitors again
+    # Only monitors that existed before this run can have results
+    reused_step_batch = StepBatch()
+    reused_monitor_ids = set()
+    if max_result_age_minutes is not None:
+        # Created and updated monitors have no result with their current settings (eg. an updated request URL or owner)
+        changed_monitor_ids = set(item['monitor_id'] for item in to_be_created_items + to_be_updated_items)
+        existing_monitor_ids = [item['monitor_id'] for item in working_list if item['monitor_id'] not in changed_monitor_ids]
+        print(f"Looking for results younger than {max_result_age_minutes} minute(s) for {len(existing_monitor_ids)} unchanged monitor(s)...")
+        reused_monitor_ids = find_fresh_execution_results(existing_monitor_ids, max_result_age_minutes, reused_step_batch)
+        print(f"Reusing recent results for {len(reused_monitor_ids)} monitor(s). The rest will be triggered.")
+
+    # monitors to trigger
+    # If they are currently in Git, we trigger but may not create (they may already exist)
+    monitors_to_trigger = [item['monitor_id'] for item in working_list if item['monitor_id'] not in reused_monitor_ids]
+
+    print(f"-- Printing Complete List of Monitors to be Triggered (should be a complete list all with names and IDs) --")
+    print(monitors_to_trigger)
+    print("-----------------")
+
+    # Every entry in the working list now has a monitor_id so index by it
+    monitor_index = { item['monitor_id']: item for item in working_list }
+
+    # Every batch triggered across all chunks. Their status is checked once all results are in
+    batch_ids = []
+
+    # Number of executions (one per location) triggered for each monitor. Its result is scored once they are all in
+    expected_location_counts = {}
+
+    # Called (on the main thread) once each chunk has been triggered
+    # Records the executions against the working list and reports anything that could not be triggered
+    # Returns the executions for the collector to poll
+    def on_chunk_triggered(chunk_result):
+        chunk_number = chunk_result['chunk_number']
+
+        if chunk_result['error'] is not None:
+            print(f"Chunk {chunk_number} could not be triggered. {chunk_result['error']}")
+            for monitor_id in chunk_result['monitor_ids']:
+                provisioning_failures.append({
+                    "endpoint": monitor_index[monitor_id]['endpoint'],
+                    "reason": f"Batch trigger failed. {chunk_result['error']}"
+                })
+            return []
+
+        batch_ids.extend(chunk_result['batch_ids'])
+
+        # Monitor IDs rejected by the batch are stale. Drop them from the cache so the next run rediscovers them
+        for rejected_monitor_id, cause in chunk_result['rejected'].items():
+            rejected_item = monitor_index[rejected_monitor_id]
+            print(f"Monitor {rejected_monitor_id} for {rejected_item['endpoint']} was rejected by the batch trigger ({cause}). Removing it from the cache.")
+            monitor_id_cache.pop(canonicalize_url(rejected_item['endpoint']), None)
+            provisioning_failures.append({
+                "endpoint": rejected_item['endpoint'],
+                "reason": f"Monitor {rejected_monitor_id} was rejected by the batch trigger ({cause}). It has been removed from the cache and will be rediscovered on the next run."
+            })
+        if len(chunk_result['rejected']) > 0:
+            save_monitor_id_cache(monitor_id_cache)
+
+        # Monitors that never finished syncing exist, so they stay cached, but they have no result this run
+        for still_syncing_monitor_id in chunk_result['still_syncing']:
+            provisioning_failures.append({
+                "endpoint": monitor_index[still_syncing_monitor_id]['endpoint'],
+                "reason": f"Monitor {still_syncing_monitor_id} was still synchronizing after {monitor_sync_timeout_seconds}s and could not be triggered."
+            })
+
+        # It is tempting to use the batch id to get details
+        # But if 1 of the URLs fails, the batch is listed as failing
+        # Instead, get the `triggered` array and for each, get the `executions` array then lookup each of those seperately.
+        # A monitor that was still syncing at some locations is triggered again for them, so it can have several entries
+        chunk_executions = []
+        for triggered_entry in chunk_result['triggered']:
+            # Get entry from working list that matches this monitorId
+            matched_entry = monitor_index[triggered_entry['monitorId']]
+            matched_entry['executions'].extend(triggered_entry['executions'])
+            expected_location_counts[triggered_entry['monitorId']] = expected_location_counts.get(triggered_entry['monitorId'], 0) + len(triggered_entry['executions'])
+            for execution in triggered_entry['executions']:
+                chunk_executions.append({
+                    "executionId": execution['executionId'],
+                    "monitorId": triggered_entry['monitorId'],
+                    "locationId": execution.get('locationId', ""),
+                    "url": matched_entry['endpoint']
+                })
+
+        print(f"Chunk {chunk_number} triggered {len(chunk_result['triggered'])} of {len(chunk_result['monitor_ids'])} monitor(s). Collecting results for {len(chunk_executions)} execution(s)...")
+        return chunk_executions
+
+    run_metrics.start_phase("result_collection")
+
+    # Step 2: Trigger the monitors in chunks
+    # Chunks are triggered in the background while earlier chunks are already being polled and scored
+    # Within a chunk, monitors that are already synced start immediately. Only newly created monitors that are still syncing are retriggered
+    batch_chunks = [monitors_to_trigger[i:i + batch_chunk_size] for i in range(0, len(monitors_to_trigger), batch_chunk_size)]
+    print(f"Triggering {len(monitors_to_trigger)} monitor(s) in {len(batch_chunks)} chunk(s) of up to {batch_chunk_size}")
+
+    trigger_executor = ThreadPoolExecutor(max_workers=BATCH_TRIGGER_MAX_WORKERS)
+    trigger_futures = [trigger_executor.submit(trigger_chunk, chunk_number, chunk) for chunk_number, chunk in enumerate(batch_chunks, start=1)]
+
+    # Results are streamed to every sink as they are scored. Nothing holds on to the fullReports
+    result_table, result_sinks = open_result_sinks(with_history=True)
+
+    # Reused results are scored first. They are already available
+    if len(reused_step_batch) > 0:
+        score_and_write_results(reused_step_batch, result_sinks)
+    reused_step_batch = None
+
+    execution_results_count = score_executions(collect_execution_results(trigger_futures, on_chunk_triggered), result_sinks, expected_location_counts)
+
+    print("=================================================================================")
+    print(f"All done. Got {execution_results_count} execution results.")
+
+    trigger_executor.shutdown()
+
+    # URLs whose monitor could not be created (or could not be triggered) are reported as failed
+    for provisioning_failure in provisioning_failures:
+        write_result(result_sinks, {
+            "url": provisioning_failure['endpoint'],
+            "score": 0,
+            "reasons": [provisioning_failure['reason']]
+        })
+
+    run_metrics.start_phase("batch_polling")
+
+    # The batches may have been marked as FAILED while they ran
+    # Each batch is checked on its own. The report is still produced for every chunk
+    # but the run exits with a failure once it has been output
+    failed_batch_ids = []
+    for batch_id in batch_ids:
+        try:
+            batch_status = get_batch(batch_id)['batchStatus']
+        except:
+            print(f"Exception caught getting batch response for {batch_id}.")
+            failed_batch_ids.append(batch_id)
+            continue
+
+        # After RUNNING, batch_status could be FAILED
+        if batch_status == "FAILED" or batch_status == "FAILED_TO_EXECUTE":
+            print(f"Batch {batch_id} ran but was FAILED or FAILED_TO_EXECUTE. Investigate. Batch Status was: {batch_status}")
+            failed_batch_ids.append(batch_id)
+
+    dynatrace_client.print_stats()
+
+    run_metrics.start_phase("output")
+    run_metrics.set_counter("results", result_table.result_count())
+    run_metrics.set_counter("provisioning_failures", len(provisioning_failures))
+    run_metrics.set_counter("failed_batches", len(failed_batch_ids))
+
+    close_result_sinks(result_table, result_sinks)
+
+    exit_code = 0
+    if len(failed_batch_ids) > 0:
+        print(f"{len(failed_batch_ids)} batch(es) finished as FAILED or FAILED_TO_EXECUTE: {failed_batch_ids}.")
+        exit_code = 1
+
+    return {
+        "exitCode": exit_code,
+        "statusCounts": result_table.status_counts,
+        "reusedCount": result_table.reused_count,
+        "regressionCount": result_table.regression_count,
+        "failedBatchIds": failed_batch_ids,
+        "tableContent": result_table.content()
+    }
+
+# Reads .dynatrace/config.json into the module's settings. Exits if it is missing or invalid
+def load_config():
+    global config_file_json, default_root_url, default_locations
+    global monitor_creation_concurrency, monitor_creation_rate_per_second, api_timeout_seconds, api_max_retries
+    global monitor_cache_ttl_hours, monitor_sync_timeout_seconds, batch_chunk_size, result_poll_interval_seconds, result_collection_timeout_seconds
+    global max_result_age_minutes, output_directory, max_table_rows, push_run_metrics
+    global serve_host, serve_port, serve_interval_minutes, delete_stale_monitors, monitor_owner
+    global local_probe_concurrency, local_probe_per_host_concurrency, local_probe_timeout_seconds
+    global scoring_rules, scoring_aggregate
+    global record_history, baseline_branch, regression_ewma_alpha, regression_z_threshold, regression_min_samples
+
+    # Load config.json if absent, stop immediately
+    try:
+        with open(f"{directory_to_scan}/{config_file_name}") as config_file:
+          config_file_json = json.load(config_file)
+    except:
+        print(f"{directory_to_scan}/{config_file_name} is missing or empty. .dynatrace/config.json must exist and have defaultRootUrl and a defaultLocations array. Cannot proceed. Please fix. Exiting...")
+        exit(1)
+
+    try:
+        default_root_url = config_file_json['defaultRootUrl']
+        default_locations = config_file_json['defaultLocations']
+    except:
+        print("Missing .dynatrace/config.json parameters. Cannot proceed. Exiting. Please see https://github.com/agardnerIT/dynatrace-endpoint-evaluator/blob/main/README.md")
+        exit(1)
+
+    # Optional parameters
+    monitor_creation_concurrency = config_file_json.get('monitorCreationConcurrency', DEFAULT_MONITOR_CREATION_CONCURRENCY)
+    monitor_creation_rate_per_second = config_file_json.get('monitorCreationRatePerSecond', DEFAULT_MONITOR_CREATION_RATE_PER_SECOND)
+    api_timeout_seconds = config_file_json.get('apiTimeoutSeconds', DEFAULT_API_TIMEOUT_SECONDS)
+    api_max_retries = config_file_json.get('apiMaxRetries', DEFAULT_API_MAX_RETRIES)
+    monitor_cache_ttl_hours = config_file_json.get('monitorCacheTtlHours', DEFAULT_MONITOR_CACHE_TTL_HOURS)
+    monitor_sync_timeout_seconds = config_file_json.get('monitorSyncTimeoutSeconds', DEFAULT_MONITOR_SYNC_TIMEOUT_SECONDS)
+    batch_chunk_size = config_file_json.get('batchChunkSize', DEFAULT_BATCH_CHUNK_SIZE)
+    result_poll_interval_seconds = config_file_json.get('resultPollIntervalSeconds', DEFAULT_RESULT_POLL_INTERVAL_SECONDS)
+    result_collection_timeout_seconds = config_file_json.get('resultCollectionTimeoutSeconds', DEFAULT_RESULT_COLLECTION_TIMEOUT_SECONDS)
+    # Opt-in. If unset, every monitor is triggered
+    max_result_age_minutes = config_file_json.get('maxResultAgeMinutes')
+    output_directory = config_file_json.get('outputDirectory', f"{directory_to_scan}/output")
+    max_table_rows = config_file_json.get('maxTableRows', DEFAULT_MAX_TABLE_ROWS)
+    push_run_metrics = config_file_json.get('pushRunMetrics', False)
+    serve_host = config_file_json.get('serveHost', DEFAULT_SERVE_HOST)
+    serve_port = config_file_json.get('servePort', DEFAULT_SERVE_PORT)
+    serve_interval_minutes = config_file_json.get('serveIntervalMinutes', DEFAULT_SERVE_INTERVAL_MINUTES)
+    delete_stale_monitors = config_file_json.get('deleteStaleMonitors', False)
+    monitor_owner = config_file_json.get('monitorOwner') or os.getenv("GITHUB_REPOSITORY", "") or DEFAULT_MONITOR_OWNER
+    local_probe_concurrency = config_file_json.get('localProbeConcurrency', DEFAULT_LOCAL_PROBE_CONCURRENCY)
+    local_probe_per_host_concurrency = config_file_json.get('localProbePerHostConcurrency', DEFAULT_LOCAL_PROBE_PER_HOST_CONCURRENCY)
+    local_probe_timeout_seconds = config_file_json.get('localProbeTimeoutSeconds', DEFAULT_LOCAL_PROBE_TIMEOUT_SECONDS)
+    try:
+        scoring_rules = load_scoring_rules(config_file_json.get('scoringRules', {}))
+    except ScoringRulesError as e:
+        print(f"Invalid scoringRules in .dynatrace/config.json: {e}. Exiting.")
+        exit(1)
+    scoring_aggregate = config_file_json.get('scoringAggregate', DEFAULT_SCORING_AGGREGATE)
+    if scoring_aggregate not in SCORING_AGGREGATES:
+        print(f"Invalid scoringAggregate in .dynatrace/config.json: {scoring_aggregate}. Use one of: {', '.join(SCORING_AGGREGATES)}. Exiting.")
+        exit(1)
+    record_history = config_file_json.get('recordHistory', True)
+    baseline_branch = config_file_json.get('baselineBranch', DEFAULT_BASELINE_BRANCH)
+    regression_ewma_alpha = config_file_json.get('regressionEwmaAlpha', DEFAULT_REGRESSION_EWMA_ALPHA)
+    regression_z_threshold = config_file_json.get('regressionZThreshold', DEFAULT_REGRESSION_Z_THRESHOLD)
+    regression_min_samples = config_file_json.get('regressionMinSamples', DEFAULT_REGRESSION_MIN_SAMPLES)
+    if not 0 < regression_ewma_alpha <= 1:
+        print(f"Invalid regressionEwmaAlpha in .dynatrace/config.json: {regression_ewma_alpha}. It must be greater than 0 and at most 1. Exiting.")
+        exit(1)
+
+# Entry point for python -m dynatrace_endpoint_evaluator (and the app.py shim)
+def main():
+    global shard_index, shard_count, dry_run, engine
+    global dt_environment_url, dt_api_token, dynatrace_client, sitemap_session
+
+    load_config()
+
+    # Action inputs arrive as INPUT_<NAME> environment variables
+    # Locally the mode can also be given as the first argument (eg. python -m dynatrace_endpoint_evaluator serve)
+    run_mode = os.getenv("INPUT_MODE", "").strip().lower() or "evaluate"
+    if len(sys.argv) > 1:
+        run_mode = sys.argv[1].strip().lower()
+    try:
+        shard_index = int(os.getenv("INPUT_SHARDINDEX", "").strip() or 0)
+        shard_count = int(os.getenv("INPUT_SHARDCOUNT", "").strip() or 1)
+    except ValueError:
+        print("shardIndex and shardCount must be whole numbers. Exiting.")
+        exit(1)
+    if shard_count < 1 or shard_index < 0 or shard_index >= shard_count:
+        print(f"Invalid shard {shard_index} of {shard_count}. shardIndex must be between 0 and shardCount - 1. Exiting.")
+        exit(1)
+    # A dry run only works out (and writes) the reconciliation plan
+    dry_run = os.getenv("INPUT_DRYRUN", "").strip().lower() == "true"
+    if run_mode not in ["evaluate", "merge", "serve"]:
+        print(f"Unknown mode: {run_mode}. Use evaluate, merge or serve. Exiting.")
+        exit(1)
+    engine = os.getenv("INPUT_ENGINE", "").strip().lower() or "dynatrace"
+    if engine not in ENGINES:
+        print(f"Unknown engine: {engine}. Use one of: {', '.join(ENGINES)}. Exiting.")
+        exit(1)
+    if engine == "local" and dry_run:
+        print("dryRun plans Dynatrace monitor changes. The local engine does not use monitors. Exiting.")
+        exit(1)
+
+    # Merge mode combines the results of every shard into one table and summary
+    # It does not talk to Dynatrace
+    if run_mode == "merge":
+        merge_directory = os.getenv("INPUT_MERGEDIRECTORY", "").strip() or DEFAULT_MERGE_DIRECTORY
+        result_table, result_sinks = open_result_sinks()
+        for result in iter_shard_results(merge_directory):
+            write_result(result_sinks, result)
+        if result_table.result_count() == 0:
+            print(f"No {RESULTS_JSONL_FILE_NAME} files found in {merge_directory}. Exiting.")
+            exit(1)
+        close_result_sinks(result_table, result_sinks)
+        exit(0)
+
+    # DT_EVALUATOR_PROFILE is for local runs. The action's profile input arrives as INPUT_PROFILE
+    profile_mode = os.getenv("DT_EVALUATOR_PROFILE", os.getenv("INPUT_PROFILE", "")).strip().lower()
+    if profile_mode != "" and profile_mode not in PROFILE_MODES:
+        print(f"Unknown profile mode: {profile_mode}. Use one of: {', '.join(PROFILE_MODES)}. Exiting.")
+        exit(1)
+    if profile_mode != "":
+        print(f"Profiling this run ({profile_mode})")
+        run_metrics.profiler = RunProfiler(profile_mode, run_metrics)
+        run_metrics.profiler.start()
+
+    # From here on, the profile and run metrics are exported however the run ends
+    # serve mode exports the run metrics after every evaluation instead
+    atexit.register(export_profile)
+    if run_mode != "serve":
+        atexit.register(export_run_metrics)
+
+    # The local engine never calls Dynatrace so it does not need the credentials
+    if engine == "dynatrace":
+        dt_environment_url = os.getenv("dt_environment_url","")
+        dt_api_token = os.getenv("dt_api_token","")
+
+        if dt_environment_url == "" or dt_api_token == "":
+            print("DT_ENVIRONMENT_URL and / or DT_API_TOKEN is missing. Please create Git Action secrets for these. Cannot proceed. Exiting.")
+            exit(1)
+
+        # Trim trailing slash from environment url if present
+        if dt_environment_url.endswith("/"):
+            dt_environment_url = dt_environment_url[:-1]
+
+        dynatrace_client = DynatraceClient(
+            environment_url=dt_environment_url,
+            api_token=dt_api_token,
+            pool_size=max(RESULT_COLLECTOR_MAX_WORKERS, monitor_creation_concurrency),
+            timeout=api_timeout_seconds,
+            max_retries=api_max_retries
+        )
+
+    # Sitemaps are downloaded from the site itself (not Dynatrace) so they get their own pooled session
+    import requests
+    import requests.adapters
+    sitemap_session = requests.Session()
+    sitemap_adapter = requests.adapters.HTTPAdapter(pool_maxsize=SITEMAP_FETCH_MAX_WORKERS)
+    sitemap_session.mount("https://", sitemap_adapter)
+    sitemap_session.mount("http://", sitemap_adapter)
+
+    # Resident mode: evaluate on a schedule, when the .dynatrace folder changes or when asked to over HTTP
+    # The Dynatrace connection pool, created monitors and caches stay warm between evaluations
+    if run_mode == "serve":
+        from dynatrace_endpoint_evaluator.serve import serve
+        serve()
+        exit(0)
+
+    evaluation = evaluate()
+    if evaluation['exitCode'] != 0:
+        print("Exiting.")
+        exit(evaluation['exitCode'])
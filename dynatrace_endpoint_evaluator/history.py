@@ -0,0 +1,157 @@
+import math
+import os
+import sqlite3
+import time
+
+from dynatrace_endpoint_evaluator.evaluator import get_result_status
+
+# The results history: every result of every run, in a SQLite file in .dynatrace/.cache
+# Imported by the evaluator only when history is recorded, so other runs do not load sqlite3
+#
+# runs      = one row per run (when, which ref and commit, whether it was a baseline run)
+# results   = one row per URL per run. Rows are only ever inserted
+# baselines = per URL and metric, an exponentially weighted moving mean and variance
+#
+# Baselines are updated incrementally as results arrive, so comparing a run never reads the rest of the history
+# Only baseline runs (eg. pushes to main) update them. Every run is compared against them
+
+HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at REAL NOT NULL,
+    engine TEXT NOT NULL,
+    git_ref TEXT NOT NULL,
+    git_sha TEXT NOT NULL,
+    is_baseline INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    score REAL NOT NULL,
+    status TEXT NOT NULL,
+    response_status_code REAL,
+    time_to_first_byte REAL,
+    total_time REAL,
+    PRIMARY KEY (run_id, url)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_by_url ON results (url, run_id);
+CREATE TABLE IF NOT EXISTS baselines (
+    engine TEXT NOT NULL,
+    url TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    mean REAL NOT NULL,
+    variance REAL NOT NULL,
+    sample_count INTEGER NOT NULL,
+    run_id INTEGER NOT NULL,
+    PRIMARY KEY (engine, url, metric)
+) WITHOUT ROWID;
+"""
+
+# Metrics compared against the baseline. 1 if a higher value is worse, -1 if a lower value is worse
+REGRESSION_METRICS = {
+    "score": -1,
+    "timeToFirstByte": 1,
+    "totalTime": 1
+}
+# The standard deviation used for the z-score is at least this share of the baseline mean (and at least 1)
+# so a URL that has always been perfectly steady is not flagged for a few milliseconds of noise
+REGRESSION_NOISE_FLOOR_RATIO = 0.05
+# A regression must also be at least this share of the baseline mean
+REGRESSION_MIN_RELATIVE_CHANGE = 0.1
+
+# The value of a metric for a result, or None if the result does not have it (eg. a monitor that could not be created)
+def get_metric_value(result, metric):
+    if metric == "score":
+        return result['score']
+    value = result.get('metrics', {}).get(metric)
+    if value is None or math.isnan(value):
+        return None
+    return value
+
+# Exponentially weighted moving mean and variance, updated with one new value
+# https://fanf2.user.srcf.net/hermes/doc/antiforgery/stats.pdf
+def update_ewma(mean, variance, value, alpha):
+    difference = value - mean
+    increment = alpha * difference
+    return mean + increment, (1 - alpha) * (variance + difference * increment)
+
+# Returns { "metric", "value", "baseline", "zScore" } if value is a regression from the baseline, otherwise None
+def find_regression(metric, value, mean, variance, z_threshold):
+    worsening = REGRESSION_METRICS[metric] * (value - mean)
+    standard_deviation = max(math.sqrt(variance), REGRESSION_NOISE_FLOOR_RATIO * abs(mean), 1)
+    z_score = worsening / standard_deviation
+    if z_score < z_threshold or worsening < REGRESSION_MIN_RELATIVE_CHANGE * abs(mean):
+        return None
+    return { "metric": metric, "value": value, "baseline": round(mean, 1), "zScore": round(z_score, 1) }
+
+# A result sink. It must come before the other sinks as it adds the regressions to each result before they are written
+# Results without metrics, and reused results, never update the baselines
+class ResultHistory:
+    def __init__(self, path, engine, is_baseline, ewma_alpha, z_threshold, min_samples):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.engine = engine
+        self.is_baseline = is_baseline
+        self.ewma_alpha = ewma_alpha
+        self.z_threshold = z_threshold
+        self.min_samples = min_samples
+        self.regression_count = 0
+        self.compared_count = 0
+
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(HISTORY_SCHEMA)
+        # Every write of this run is one transaction, committed by close()
+        self.run_id = self.connection.execute(
+            "INSERT INTO runs (started_at, engine, git_ref, git_sha, is_baseline) VALUES (?, ?, ?, ?, ?)",
+            (time.time(), engine, os.getenv("GITHUB_REF_NAME", ""), os.getenv("GITHUB_SHA", ""), int(is_baseline))
+        ).lastrowid
+
+    def write(self, result):
+        metric_values = { metric: get_metric_value(result, metric) for metric in REGRESSION_METRICS }
+        self.connection.execute(
+            "INSERT OR IGNORE INTO results (run_id, url, score, status, response_status_code, time_to_first_byte, total_time) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (self.run_id, result['url'], result['score'], get_result_status(result['score']), get_metric_value(result, "responseStatusCode"), metric_values['timeToFirstByte'], metric_values['totalTime'])
+        )
+        if "metrics" not in result:
+            return
+
+        baselines = {
+            metric: (mean, variance, sample_count)
+            for metric, mean, variance, sample_count in self.connection.execute(
+                "SELECT metric, mean, variance, sample_count FROM baselines WHERE engine = ? AND url = ?",
+                (self.engine, result['url'])
+            )
+        }
+
+        regressions = []
+        compared = False
+        for metric, value in metric_values.items():
+            if value is None:
+                continue
+            baseline = baselines.get(metric)
+            if baseline is not None and baseline[2] >= self.min_samples:
+                compared = True
+                regression = find_regression(metric, value, baseline[0], baseline[1], self.z_threshold)
+                if regression is not None:
+                    regressions.append(regression)
+
+            if not self.is_baseline or result.get('reused', False):
+                continue
+            if baseline is None:
+                mean, variance, sample_count = value, 0.0, 1
+            else:
+                mean, variance = update_ewma(baseline[0], baseline[1], value, self.ewma_alpha)
+                sample_count = baseline[2] + 1
+            self.connection.execute(
+                "INSERT OR REPLACE INTO baselines (engine, url, metric, mean, variance, sample_count, run_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.engine, result['url'], metric, mean, variance, sample_count, self.run_id)
+            )
+
+        if compared:
+            self.compared_count += 1
+        if len(regressions) > 0:
+            result['regressions'] = regressions
+            self.regression_count += 1
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
@@ -0,0 +1,191 @@
+import asyncio
+import queue
+import socket
+import ssl
+import threading
+import time
+import urllib.parse
+
+# The local engine: probes URLs straight from the runner instead of through Dynatrace synthetic monitors
+# Imported by the evaluator only when engine is local, so other runs do not load asyncio and ssl
+
+PROBE_READ_SIZE = 64 * 1024
+PROBE_USER_AGENT = "dynatrace-endpoint-evaluator"
+# Reported as the location of every probed URL
+PROBE_LOCATION_ID = "runner"
+# Characters left as they are when the path and query are quoted for the request line (as requests does)
+REQUEST_TARGET_SAFE_CHARACTERS = "!#$%&'()*+,/:;=?@[]~"
+# Redirects are followed like the synthetic monitor does (followRedirects), up to this many hops
+PROBE_MAX_REDIRECTS = 10
+PROBE_REDIRECT_STATUS_CODES = [301, 302, 303, 307, 308]
+
+def elapsed_milliseconds(start_time, end_time):
+    return round((end_time - start_time) * 1000)
+
+# "CN=example.com, O=Example" from the subject of ssl.getpeercert()
+def format_certificate_subject(peer_certificate):
+    return ", ".join(f"{key}={value}" for relative_name in peer_certificate.get("subject", ()) for key, value in relative_name)
+
+# Probes one URL and returns a step in the same shape as fullResults.executionSteps, so the scoring rules apply unchanged
+# Times are in milliseconds. Like the synthetic monitor, redirects are followed (up to PROBE_MAX_REDIRECTS)
+# The final response is scored. Its totalTime includes the time spent on the redirects before it
+async def probe_url(url):
+    start_time = time.perf_counter()
+    request_url = url
+    for _ in range(PROBE_MAX_REDIRECTS + 1):
+        step, location = await probe_request(request_url)
+        if step['responseStatusCode'] not in PROBE_REDIRECT_STATUS_CODES or location is None:
+            step['requestName'] = url
+            step['totalTime'] = elapsed_milliseconds(start_time, time.perf_counter())
+            return step
+        request_url = urllib.parse.urljoin(request_url, location)
+    raise ValueError(f"More than {PROBE_MAX_REDIRECTS} redirects")
+
+# A single GET request. Returns (step, the Location header or None)
+# If the certificate cannot be verified, the URL is requested again without verification and reported as insecure
+async def probe_request(url, verify_certificate=True):
+    url_parts = urllib.parse.urlsplit(url)
+    is_https = url_parts.scheme == "https"
+    host = url_parts.hostname
+    port = url_parts.port or (443 if is_https else 80)
+    request_path = urllib.parse.quote(url_parts.path or "/", safe=REQUEST_TARGET_SAFE_CHARACTERS)
+    if url_parts.query != "":
+        request_path += "?" + urllib.parse.quote(url_parts.query, safe=REQUEST_TARGET_SAFE_CHARACTERS)
+    loop = asyncio.get_running_loop()
+
+    step = {
+        "requestName": url,
+        "peerCertificateDetails": "",
+        "peerCertificateExpiryDate": 0
+    }
+
+    start_time = time.perf_counter()
+    address_infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    resolved_time = time.perf_counter()
+    step['hostNameResolutionTime'] = elapsed_milliseconds(start_time, resolved_time)
+
+    family, socket_type, protocol, _, address = address_infos[0]
+    probe_socket = socket.socket(family, socket_type, protocol)
+    probe_socket.setblocking(False)
+    try:
+        await loop.sock_connect(probe_socket, address)
+    except BaseException:
+        probe_socket.close()
+        raise
+    connected_time = time.perf_counter()
+    step['tcpConnectTime'] = elapsed_milliseconds(resolved_time, connected_time)
+
+    ssl_context = None
+    if is_https:
+        ssl_context = ssl.create_default_context()
+        if not verify_certificate:
+            ssl_context.check_hostname = False
+            ssl_context.verify_mode = ssl.CERT_NONE
+    try:
+        reader, writer = await asyncio.open_connection(sock=probe_socket, ssl=ssl_context, server_hostname=host if is_https else None)
+    except ssl.SSLCertVerificationError:
+        probe_socket.close()
+        return await probe_request(url, verify_certificate=False)
+    handshake_time = time.perf_counter()
+    step['tlsHandshakeTime'] = elapsed_milliseconds(connected_time, handshake_time) if is_https else 0
+
+    try:
+        ssl_object = writer.get_extra_info("ssl_object")
+        if ssl_object is not None and verify_certificate:
+            peer_certificate = ssl_object.getpeercert()
+            step['peerCertificateDetails'] = format_certificate_subject(peer_certificate)
+            step['peerCertificateExpiryDate'] = ssl.cert_time_to_seconds(peer_certificate['notAfter']) * 1000
+
+        host_header = url_parts.netloc.rsplit("@", 1)[-1]
+        writer.write(f"GET {request_path} HTTP/1.1\r\nHost: {host_header}\r\nUser-Agent: {PROBE_USER_AGENT}\r\nAccept: */*\r\nConnection: close\r\n\r\n".encode("latin-1"))
+        await writer.drain()
+        request_sent_time = time.perf_counter()
+
+        status_line = await reader.readline()
+        step['timeToFirstByte'] = elapsed_milliseconds(request_sent_time, time.perf_counter())
+        status_line_parts = status_line.split()
+        if len(status_line_parts) < 2 or not status_line_parts[0].startswith(b"HTTP/") or not status_line_parts[1].isdigit():
+            raise ValueError(f"Invalid HTTP status line: {status_line[:100]!r}")
+        step['responseStatusCode'] = int(status_line_parts[1])
+
+        location = None
+        while True:
+            header_line = await reader.readline()
+            if header_line in (b"\r\n", b"\n", b""):
+                break
+            header_name, _, header_value = header_line.decode("latin-1").partition(":")
+            if header_name.strip().lower() == "location":
+                location = header_value.strip()
+
+        # The body is read (and discarded) so totalTime covers the whole response
+        while len(await reader.read(PROBE_READ_SIZE)) > 0:
+            pass
+        step['totalTime'] = elapsed_milliseconds(start_time, time.perf_counter())
+    finally:
+        writer.close()
+
+    return step, location
+
+# Probes every URL. urls is a dictionary of the URL results are reported for to the URL requested
+# At most concurrency probes run at once and at most per_host_concurrency against any one host
+# Each finished probe is put on probe_results as (url, step, error). None is put once every probe has finished
+async def run_local_probes(urls, probe_results, concurrency, per_host_concurrency, timeout_seconds):
+    # Semaphores are created here as (before Python 3.10) they bind to the running loop
+    probe_semaphore = asyncio.Semaphore(concurrency)
+    host_semaphores = {}
+
+    async def probe(url, request_url):
+        host = urllib.parse.urlsplit(request_url).hostname
+        if host not in host_semaphores:
+            host_semaphores[host] = asyncio.Semaphore(per_host_concurrency)
+        try:
+            # The host is waited on first, so probes queued behind a busy host do not hold one of the overall slots
+            async with host_semaphores[host]:
+                async with probe_semaphore:
+                    step = await asyncio.wait_for(probe_url(request_url), timeout_seconds)
+            step['requestName'] = url
+            probe_results.put((url, step, None))
+        except asyncio.TimeoutError:
+            probe_results.put((url, None, f"No response within {timeout_seconds}s"))
+        except Exception as e:
+            probe_results.put((url, None, f"{type(e).__name__}: {e}"))
+
+    try:
+        await asyncio.gather(*[probe(url, request_url) for url, request_url in urls.items()])
+    finally:
+        probe_results.put(None)
+
+# The event loop runs in its own thread so executions can be scored on this one as the probes finish
+# Yields one execution (shaped like a fullReport) per URL that could be probed
+# URLs that could not be probed (DNS, connection or timeout errors) are appended to probe_failures
+def iter_local_probe_executions(urls, probe_failures, concurrency, per_host_concurrency, timeout_seconds):
+    probe_results = queue.Queue()
+
+    def run_event_loop():
+        try:
+            asyncio.run(run_local_probes(urls, probe_results, concurrency, per_host_concurrency, timeout_seconds))
+        except BaseException as e:
+            print(f"Local probing stopped unexpectedly. {e}")
+            probe_results.put(None)
+
+    probe_thread = threading.Thread(target=run_event_loop, name="local-probes", daemon=True)
+    probe_thread.start()
+
+    while True:
+        probe_result = probe_results.get()
+        if probe_result is None:
+            break
+        url, step, error = probe_result
+        if error is not None:
+            print(f"Could not probe {url}. {error}")
+            probe_failures.append({
+                "endpoint": url,
+                "reason": f"Could not probe {url}. {error}"
+            })
+            continue
+        yield {
+            "locationId": PROBE_LOCATION_ID,
+            "fullResults": { "executionSteps": [step] }
+        }
+
+    probe_thread.join()
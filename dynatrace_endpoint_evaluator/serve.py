@@ -0,0 +1,171 @@
+import datetime
+import json
+import os
+import queue
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from dynatrace_endpoint_evaluator import evaluator
+
+# Resident mode: evaluate on a schedule, when the .dynatrace folder changes or when asked to over HTTP
+# Imported by main() only in serve mode. The settings are the evaluator's, loaded by main() before serve() is called
+
+# How often the .dynatrace folder is checked for changes
+SERVE_WATCH_INTERVAL_SECONDS = 5
+
+# Modification time and size of every file the evaluation reads from the .dynatrace folder
+def snapshot_directory(directory):
+    snapshot = {}
+    for file_or_dir in os.scandir(directory):
+        if file_or_dir.is_file():
+            file_stat = file_or_dir.stat()
+            snapshot[file_or_dir.path] = (file_stat.st_mtime_ns, file_stat.st_size)
+    return snapshot
+
+# Evaluate once, catching anything that would otherwise end the process
+def run_evaluation(reason):
+    print(f"==== Evaluating ({reason}) ====")
+    evaluator.run_metrics.reset()
+    started_at = datetime.datetime.now(datetime.timezone.utc)
+    try:
+        evaluation = evaluator.evaluate()
+    except SystemExit as e:
+        evaluation = { "exitCode": e.code if isinstance(e.code, int) else 1, "error": "The evaluation exited early. See the log." }
+    except Exception as e:
+        print(f"Exception caught evaluating: {e}")
+        evaluation = { "exitCode": 1, "error": str(e) }
+    evaluator.export_run_metrics()
+    evaluation['reason'] = reason
+    evaluation['startedAt'] = started_at.isoformat()
+    evaluation['finishedAt'] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    return evaluation
+
+# Evaluation requests from the HTTP API. They are run one at a time by the serve() loop
+# Every request waiting when an evaluation starts gets the result of that evaluation
+evaluation_requests = queue.Queue()
+last_evaluation = None
+evaluation_in_progress = threading.Event()
+
+class ServeRequestHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status_code, body):
+        response_body = json.dumps(body).encode("utf-8")
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response_body)))
+        self.end_headers()
+        self.wfile.write(response_body)
+
+    # GET /healthz: the process is up
+    # GET /results: summary of the last evaluation
+    # GET /results.jsonl: every result of the last evaluation
+    def do_GET(self):
+        path = urllib.parse.urlsplit(self.path).path
+        if path == "/healthz":
+            return self.send_json(200, {
+                "status": "ok",
+                "evaluating": evaluation_in_progress.is_set(),
+                "lastEvaluationFinishedAt": None if last_evaluation is None else last_evaluation['finishedAt']
+            })
+        if path == "/results":
+            if last_evaluation is None:
+                return self.send_json(404, { "error": "No evaluation has finished yet" })
+            return self.send_json(200, last_evaluation)
+        if path == "/results.jsonl":
+            results_path = f"{evaluator.output_directory}/{evaluator.RESULTS_JSONL_FILE_NAME}"
+            if last_evaluation is None or not os.path.isfile(results_path):
+                return self.send_json(404, { "error": "No evaluation has finished yet" })
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Content-Length", str(os.path.getsize(results_path)))
+            self.end_headers()
+            with open(results_path, "rb") as results_file:
+                while True:
+                    chunk = results_file.read(evaluator.SITEMAP_CHUNK_SIZE)
+                    if chunk == b"":
+                        break
+                    self.wfile.write(chunk)
+            return
+        self.send_json(404, { "error": f"Unknown path {path}" })
+
+    # POST /evaluate: evaluate now and respond with the summary once it is done
+    # POST /evaluate?wait=false: respond straight away with 202
+    def do_POST(self):
+        split_path = urllib.parse.urlsplit(self.path)
+        if split_path.path != "/evaluate":
+            return self.send_json(404, { "error": f"Unknown path {split_path.path}" })
+        wait_for_evaluation = urllib.parse.parse_qs(split_path.query).get("wait", ["true"])[0] != "false"
+        evaluation_request = { "reason": "HTTP request", "done": threading.Event(), "evaluation": None }
+        evaluation_requests.put(evaluation_request)
+        if not wait_for_evaluation:
+            return self.send_json(202, { "status": "queued" })
+        evaluation_request['done'].wait()
+        self.send_json(200, evaluation_request['evaluation'])
+
+def serve():
+    global last_evaluation
+
+    server = ThreadingHTTPServer((evaluator.serve_host, evaluator.serve_port), ServeRequestHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="serve-http", daemon=True).start()
+    print(f"Serving on http://{evaluator.serve_host}:{server.server_address[1]}. POST /evaluate, GET /results, GET /healthz")
+    if evaluator.serve_interval_minutes > 0:
+        print(f"Evaluating every {evaluator.serve_interval_minutes} minute(s) and whenever {evaluator.directory_to_scan} changes")
+    else:
+        print(f"Evaluating whenever {evaluator.directory_to_scan} changes or on request")
+
+    config_path = f"{evaluator.directory_to_scan}/{evaluator.config_file_name}"
+    directory_snapshot = snapshot_directory(evaluator.directory_to_scan)
+    next_scheduled_time = time.monotonic()
+    reason = "startup"
+
+    try:
+        while True:
+            waiting_requests = []
+            if reason is None:
+                try:
+                    waiting_requests.append(evaluation_requests.get(timeout=SERVE_WATCH_INTERVAL_SECONDS))
+                    reason = waiting_requests[0]['reason']
+                except queue.Empty:
+                    pass
+
+            if reason is None:
+                current_snapshot = snapshot_directory(evaluator.directory_to_scan)
+                if current_snapshot != directory_snapshot:
+                    if current_snapshot.get(config_path) != directory_snapshot.get(config_path):
+                        print(f"{config_path} changed. Restart the evaluator to apply it.")
+                    directory_snapshot = current_snapshot
+                    reason = f"{evaluator.directory_to_scan} changed"
+                elif evaluator.serve_interval_minutes > 0 and time.monotonic() >= next_scheduled_time:
+                    reason = "schedule"
+
+            if reason is None:
+                continue
+
+            # Requests that arrived in the meantime are answered by this evaluation too
+            while True:
+                try:
+                    waiting_requests.append(evaluation_requests.get_nowait())
+                except queue.Empty:
+                    break
+
+            evaluation_in_progress.set()
+            last_evaluation = run_evaluation(reason)
+            evaluation_in_progress.clear()
+            print(f"Evaluation finished with exit code {last_evaluation['exitCode']}")
+            for evaluation_request in waiting_requests:
+                evaluation_request['evaluation'] = last_evaluation
+                evaluation_request['done'].set()
+
+            # Changes made by the evaluation itself (eg. caches) are not changes to watch for
+            directory_snapshot = snapshot_directory(evaluator.directory_to_scan)
+            next_scheduled_time = time.monotonic() + evaluator.serve_interval_minutes * 60
+            reason = None
+    except KeyboardInterrupt:
+        print("Stopping.")
+    finally:
+        server.shutdown()